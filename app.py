@@ -1,28 +1,81 @@
 from fastapi import FastAPI, HTTPException, Body, File, UploadFile,Form
-from fastapi.responses import JSONResponse
-from utils.llms import llm_with_tool
-from services.tools import act, order, list_response, followup_handler
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
+import os
+import tempfile
 
 # Custom Imports
-from services.milvus_services import insert, search,delete_colletion
-from services.llm_response import llm
+from services.milvus_services import delete_colletion, run_in_store_executor, get_fanout_stats
+from services.ingestion_jobs import ingestion_queue, SpooledUpload, QueueFull
+from services.chat_service import answer, stream_answer, get_speculation_stats
+from services.embedder import query_cache, embedding_executor
+from services.answer_cache import answer_cache
+from services.embedding_store import embedding_store
+from services.vector_store import parse_filters
+from services import followup_classifier
+from services.tools import followup_handler
+from services import warmup
+from utils.llms import warmup_llms, close_llms
+from utils.llm_scheduler import llm_scheduler, RateLimitExceeded
+from utils.singleflight import get_coalescing_stats
+from utils.observability import configure_logging, metrics_payload, RequestContextMiddleware
+
+configure_logging()
+logger = logging.getLogger("app")
 
 # <----- FastAPI ----->
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_llms((followup_handler,))
+    await ingestion_queue.start()
+    # Warm-up runs in the background; /readyz reports when it is done
+    warmup_task = asyncio.create_task(warmup.warm_up())
+    yield
+    warmup_task.cancel()
+    query_cache.flush()
+    await ingestion_queue.stop()
+    await close_llms()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestContextMiddleware)
 
 # <----- ENDPOINTS ----->
 @app.get("/")
 async def root():
     return JSONResponse(content="Hello from The Laws!!!", status_code=200)
 
+@app.get("/stats")
+async def stats():
+    return JSONResponse(content={"embedding_cache": query_cache.stats(), "answer_cache": answer_cache.stats(), "followup_classifier": followup_classifier.get_stats(), "speculative_search": get_speculation_stats(), "embedding_store": embedding_store.stats() if embedding_store else None, "embedding_executor": embedding_executor.stats(), "fanout_search": get_fanout_stats(), "llm_scheduler": llm_scheduler.stats(), "coalescing": get_coalescing_stats()}, status_code=200)
+
+# <----- Probes ----->
+# Liveness only says the process serves requests; readiness waits for warm-up
+@app.get("/healthz")
+async def healthz():
+    return JSONResponse(content={"status": "ok", "ready": warmup.is_ready(), "dependencies": warmup.health()}, status_code=200)
+
+@app.get("/readyz")
+async def readyz():
+    ready = warmup.is_ready()
+    return JSONResponse(content={"ready": ready, "dependencies": warmup.health()}, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics():
+    payload, content_type = metrics_payload()
+    return Response(content=payload, media_type=content_type)
+
 # <----- File Upload ----->
 @app.post("/upload")
 async def ask(category: str = Form(...), file: UploadFile = File(...)):
@@ -30,7 +83,7 @@ async def ask(category: str = Form(...), file: UploadFile = File(...)):
     allowed_extensions = ["pdf", "json"]
     file_extension = file_name.split(".")[-1]
     f_name = file_name.split(".")[0]
-    print(f"File Extension: {file_extension}")
+    logger.info("Upload %s to %s", file_name, category)
 
     if file_extension not in allowed_extensions:
         return JSONResponse(content="Unsupported file format!!!", status_code=400)
@@ -38,11 +91,34 @@ async def ask(category: str = Form(...), file: UploadFile = File(...)):
     if not category:
         return JSONResponse(content="Category Invalid!!!", status_code=400)
     
-    response = insert(collection=category, file_name=f_name, file_type=file_extension, file=file)
-    if response:
-        return JSONResponse(content="success", status_code=200)
-    else:
-        raise HTTPException(detail="There was an error inserting Data", status_code=400)
+    # Backpressure: refuse before spooling the body when every queue slot is taken
+    if ingestion_queue.full():
+        return JSONResponse(content="Upload queue is full, try again later", status_code=429, headers={"Retry-After": "30"})
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as spool:
+        try:
+            while chunk := await file.read(1024 * 1024):
+                spool.write(chunk)
+        except BaseException:
+            # Client went away or the disk is full: nothing owns the spool file yet
+            spool.close()
+            os.unlink(spool.name)
+            raise
+    upload = SpooledUpload(path=spool.name, filename=file_name)
+
+    try:
+        job = ingestion_queue.submit(collection=category, file_name=f_name, file_type=file_extension, upload=upload)
+    except QueueFull:
+        upload.close()
+        return JSONResponse(content="Upload queue is full, try again later", status_code=429, headers={"Retry-After": "30"})
+    return JSONResponse(content=job.to_dict(), status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(detail="Job not found", status_code=404)
+    return JSONResponse(content=job.to_dict(), status_code=200)
 
 # <----- Chat ----->
 @app.post("/chat")
@@ -51,6 +127,10 @@ async def chat(request: dict =  Body(...)):
     # tool_llama = llm_with_tool(act, order)
     chat_history = request.get("chat_history", [])
     current_intent = request.get("intent")
+    try:
+        filters = parse_filters(request.get("filters"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     # prompt = f"""You are an Legal AI assistant with access to the following tools:
     # 1. act: Use this tool to provide details about Indian Acts and their sections.
     # 2. order: Use this tool to fetch or explain Indian court orders or judgements.
@@ -74,64 +154,50 @@ async def chat(request: dict =  Body(...)):
 
         # if(res.tool_calls):
             # print(f"Intent Tool Called:{res.tool_calls[0]['name']}")
-        listtool=llm_with_tool(followup_handler)
-        listprompt=f"""You are a Legal AI assistant.  
-        You have access to 1 tool: `followup_handler`.  
-
-        You MUST CALL `followup_handler` if:  
-        1. The user's message is a follow-up to a previous conversation.  
-        2. The user's message is unclear, ambiguous, or lacks sufficient context to provide a confident answer.  
-
-        Examples:  
-        - User: "What does the Indian Contract Act, 1872 say about minors entering contracts?"  
-        Assistant: "It states that contracts with minors are void from the beginning."  
-        User: "What about exceptions?"  
-        Tool: `followup_handler`  
-
-        - User: "Explain the legal implications here." (without context)  
-        Tool: `followup_handler`  
-
-        Query:  
-        {query}
-        """
-        toolprompt={"role":"user","content":listprompt}
-        chat_history.append(toolprompt)
-        listres=listtool.invoke(input=chat_history)
-        chat_history.pop()
-        chat_history.pop()
-        list_token=0
-        if(listres.tool_calls):
-            list_token=listres.usage_metadata["total_tokens"]
-            if(listres.tool_calls[0]['name']=="followup_handler"):
-                query=listres.tool_calls[0]['args']['query']
-                print(f"Restructured Query: {query}")
-                context = search(query=query,collection=current_intent)
-        else:
-                context = search(query=query,collection=current_intent)
-        if(context):
-            ids=context[1]
-            response = llm(query=query,chat_history=chat_history, context=context[0])
-            response=list(response)
-            response[1] = response [1]  + list_token
-            response.append(current_intent)
-            response.append(ids)
-            return JSONResponse(content=response, status_code=200)
-        else:
-            response=["Sorry, but I couldn't find any relevant information related to your query. Kindly provide additional details or clarify your request so I may assist you accurately.",list_token,current_intent,[]]
-            return JSONResponse(content=response,status_code=200)
+        response = await answer(query=query, chat_history=chat_history, current_intent=current_intent, filters=filters)
+        return JSONResponse(content=response, status_code=200)
             # else:
             #     return ["As a Legal Assistant, my role is to provide information and guidance on legal matters.\n\nTo answer your question, I would need to provide information outside of my designated scope. Instead, I would like to inform you to ask a question relevant to a legal context, such as contract law, intellectual property, or any other legal topic. I'll be happy to assist you with that.\n\nPlease ask a question related to law, and I'll do my best to provide a helpful response.",initial_token,current_intent]
+    except RateLimitExceeded as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after + 0.5))})
     except Exception as e:
-            if "rate limit" in str(e).lower():
-                raise HTTPException(status_code=429, detail="Groq rate limit exceeded. Try Again After 24 Hours")
-            print(e)
+            logger.exception("Chat failed")
             raise  HTTPException(status_code=500, detail=str(e))
 
+# <----- Chat Stream (SSE) ----->
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: dict =  Body(...)):
+    query = request.get("query")
+    chat_history = request.get("chat_history", [])
+    current_intent = request.get("intent")
+    try:
+        filters = parse_filters(request.get("filters"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            async for event, data in stream_answer(query=query, chat_history=chat_history, current_intent=current_intent, filters=filters):
+                if event == "token":
+                    yield sse_event("token", {"token": data})
+                else:
+                    yield sse_event(event, data)
+        except RateLimitExceeded as e:
+            yield sse_event("error", {"status": 429, "detail": str(e), "retry_after": round(e.retry_after)})
+        except Exception as e:
+            logger.exception("Chat stream failed")
+            yield sse_event("error", {"status": 500, "detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # <------ Delete------->
 @app.post("/delete")
 async def delete(delete: str = Body(...)):
     if delete=="Yes":
-        delete_colletion()
+        await run_in_store_executor(delete_colletion)
     
 # if __name__ == "__main__":
 #     import uvicorn
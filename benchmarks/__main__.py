@@ -0,0 +1,39 @@
+# Runs the offline suite with small presets and writes one JSON report, e.g. to compare
+# two commits:
+#
+#   python -m benchmarks --output before.json
+#   python -m benchmarks --output after.json --only chat chat_uncached upload
+import argparse
+import json
+
+from benchmarks import chat_concurrency, chunker_throughput, cleaning_throughput, extractor_throughput, upload_latency
+from benchmarks.report import environment
+
+SUITE = {
+    "chunker": (chunker_throughput.main, ["--sizes", "1", "5"]),
+    "cleaning": (cleaning_throughput.main, ["--sizes", "1", "10"]),
+    "extractors": (extractor_throughput.main, ["--sizes", "0.1", "0.5"]),
+    "upload": (upload_latency.main, ["--sizes", "0.05", "0.2", "--repeat", "3"]),
+    "chat": (chat_concurrency.main, ["--clients", "1", "8", "32", "--requests", "10"]),
+    "chat_uncached": (chat_concurrency.main, ["--clients", "1", "8", "32", "--requests", "10", "--unique-queries", "--no-cache"]),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=list(SUITE), help="run only these benchmarks")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    reports = {}
+    for name, (run, preset) in SUITE.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"\n== {name} ==")
+        reports[name] = run(preset)["results"]
+
+    with open(args.output, "w") as file:
+        json.dump({"environment": environment(), "benchmarks": reports}, file, indent=2)
+    print(f"\nWrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# /chat latency (p50/p95/p99) and requests per second at N parallel clients, against
+# stubbed Groq and Nomic and the in-process vector store seeded with synthetic judgments.
+# By default clients replay a small query pool, so with more clients most requests are
+# answer-cache hits or coalesced duplicates; the hit and coalesced rates are reported next
+# to the RPS. --unique-queries (every request a new query, with a chat history) and
+# --no-cache (answer cache and coalescing off) measure rewrite, retrieval and generation.
+#
+#   python -m benchmarks.chat_concurrency --clients 1 4 16 64 --requests 20 --output chat.json
+#   python -m benchmarks.chat_concurrency --unique-queries --no-cache
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from benchmarks import fakes
+from benchmarks.synthetic import paragraph
+from benchmarks.report import percentiles, write_report
+from benchmarks.synthetic import judgment_json, sentence
+
+def seed_corpus(documents: int, size: int):
+    from services.milvus_services import insert
+
+    for seed in range(documents):
+        body = json.dumps(judgment_json(size, seed)).encode("utf-8")
+        insert(collection="order", file_name=f"bench_judgment_{seed}", file_type="json", file=SimpleNamespace(file=io.BytesIO(body)))
+
+# A fresh query after two earlier turns, so nothing repeats and the follow-up path runs
+def unique_request(rng: random.Random) -> tuple[str, list[dict]]:
+    history = []
+    for _ in range(2):
+        history.append({"role": "user", "content": sentence(rng)})
+        history.append({"role": "assistant", "content": paragraph(rng)})
+    query = sentence(rng)
+    return query, history + [{"role": "user", "content": query}]
+
+def counters() -> tuple[int, int, int, int]:
+    from services.answer_cache import answer_cache
+    from services.chat_service import chat_flight
+
+    return answer_cache.hits, answer_cache.misses, chat_flight.calls, chat_flight.coalesced
+
+async def run_clients(app, clients: int, requests_per_client: int, queries: list[str], unique: bool = False) -> dict:
+    import httpx
+
+    latencies = []
+
+    async def client(http, rng: random.Random):
+        for _ in range(requests_per_client):
+            if unique:
+                query, history = unique_request(rng)
+            else:
+                query, history = rng.choice(queries), []
+            payload = {"query": query, "chat_history": history, "intent": "order"}
+            start = time.perf_counter()
+            response = await http.post("/chat", json=payload)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    transport = httpx.ASGITransport(app=app)
+    before = counters()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        start = time.perf_counter()
+        # Clients of different runs draw different queries in --unique-queries mode
+        await asyncio.gather(*(client(http, random.Random(f"{clients}-{index}")) for index in range(clients)))
+        elapsed = time.perf_counter() - start
+    hits, misses, calls, coalesced = (after - previous for after, previous in zip(counters(), before))
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": percentiles(latencies),
+        "answer_cache_hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "coalesced_rate": round(coalesced / calls, 4) if calls else 0.0,
+    }
+
+async def run(app, args) -> list[dict]:
+    from services.answer_cache import answer_cache
+    from utils import singleflight
+
+    rng = random.Random(0)
+    queries = [sentence(rng) for _ in range(args.distinct_queries)]
+    results = []
+    # Switched at runtime (not through the env), so the suite can run both modes in one process
+    cache_size, coalescing = answer_cache.maxsize, singleflight.COALESCING
+    if args.no_cache:
+        answer_cache.clear()
+        answer_cache.maxsize, singleflight.COALESCING = 0, False
+    try:
+        async with app.router.lifespan_context(app):
+            for clients in args.clients:
+                result = await run_clients(app, clients, args.requests, queries, unique=args.unique_queries)
+                results.append(result)
+                latency = result["latency_ms"]
+                print(f"{result['clients']:>8} {result['requests']:>9} {result['seconds']:>8} {result['rps']:>8} "
+                      f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f} "
+                      f"{result['answer_cache_hit_rate']:>9.2%} {result['coalesced_rate']:>10.2%}")
+    finally:
+        answer_cache.maxsize, singleflight.COALESCING = cache_size, coalescing
+    return results
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="/chat latency and requests per second at N parallel clients")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--distinct-queries", type=int, default=50, help="size of the query pool clients draw from")
+    parser.add_argument("--unique-queries", action="store_true", help="a new query with a chat history for every request")
+    parser.add_argument("--no-cache", action="store_true", help="turn off the answer cache and request coalescing")
+    parser.add_argument("--documents", type=int, default=20, help="synthetic judgments in the seeded collection")
+    parser.add_argument("--document-size", type=int, default=50_000, help="characters per synthetic judgment")
+    parser.add_argument("--llm-latency", type=float, default=fakes.latency["llm"])
+    parser.add_argument("--embed-latency", type=float, default=fakes.latency["embed"])
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    fakes.latency.update(llm=args.llm_latency, embed=args.embed_latency)
+    fakes.install()
+    from app import app
+
+    seed_corpus(args.documents, args.document_size)
+    print(f"{'clients':>8} {'requests':>9} {'seconds':>8} {'rps':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'cache_hit':>9} {'coalesced':>10}")
+    results = asyncio.run(run(app, args))
+    return write_report(args.output, "chat_concurrency", vars(args), results)
+
+if __name__ == "__main__":
+    main()
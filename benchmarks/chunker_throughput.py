@@ -0,0 +1,74 @@
+# Chunker throughput on large synthetic judgments, against the per-character and
+# string-concatenation loops the extractors used before.
+#
+#   python -m benchmarks.chunker_throughput --sizes 1 5 20
+import argparse
+import re
+import time
+
+from benchmarks.report import write_report
+from benchmarks.synthetic import judgment_text
+from utils.chunker import split_fixed, split_sentences, pack_chunks
+
+def legacy_metadata_chunks(metadata: str, size: int) -> list[str]:
+    chunks = []
+    temp_text = ""
+    for char in metadata:
+        if len(temp_text) + 1 > size:
+            chunks.append(temp_text.strip())
+            temp_text = char
+        else:
+            temp_text += char
+    if temp_text:
+        chunks.append(temp_text.strip())
+    return chunks
+
+def legacy_sentence_chunks(text: str, max_chunk_size: int) -> list[str]:
+    sentences = re.split(r'(?<=[.!?]) +', text)
+    chunks = []
+    temp_text = ""
+    for sentence in sentences:
+        if len(temp_text) + len(sentence) > max_chunk_size:
+            if temp_text:
+                chunks.append(temp_text.strip())
+            temp_text = sentence
+        else:
+            temp_text += " " + sentence if temp_text else sentence
+    if temp_text:
+        chunks.append(temp_text.strip())
+    return chunks
+
+def timed(func, *args) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Chunker throughput on synthetic judgments")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 5, 20], help="document sizes in MB")
+    parser.add_argument("--max-chunk-size", type=int, default=2000)
+    parser.add_argument("--metadata-chunk-size", type=int, default=3000)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'MB':>6} {'case':>10} {'legacy MB/s':>12} {'engine MB/s':>12} {'chunks':>8} {'same':>5}")
+    for size in args.sizes:
+        text = judgment_text(int(size * 1024 * 1024))
+        mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+        cases = [
+            ("metadata", legacy_metadata_chunks, lambda t: list(split_fixed(t, args.metadata_chunk_size)), args.metadata_chunk_size),
+            ("sentences", legacy_sentence_chunks, lambda t: list(pack_chunks(split_sentences(t), args.max_chunk_size)), args.max_chunk_size),
+        ]
+        for name, legacy, engine, chunk_size in cases:
+            legacy_seconds, legacy_chunks = timed(legacy, text, chunk_size)
+            engine_seconds, engine_chunks = timed(engine, text)
+            print(f"{mb:>6.1f} {name:>10} {mb / legacy_seconds:>12.1f} {mb / engine_seconds:>12.1f} "
+                  f"{len(engine_chunks):>8} {str(legacy_chunks == engine_chunks):>5}")
+            results.append({"case": name, "mb": round(mb, 3), "legacy_mb_per_s": round(mb / legacy_seconds, 2), "engine_mb_per_s": round(mb / engine_seconds, 2), "chunks": len(engine_chunks), "same": legacy_chunks == engine_chunks})
+
+    return write_report(args.output, "chunker_throughput", vars(args), results)
+
+if __name__ == "__main__":
+    main()
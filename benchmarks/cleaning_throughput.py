@@ -0,0 +1,71 @@
+# Act and order cleaning throughput (MB/s) on large synthetic documents, against the
+# one-re.sub-per-rule cleaners the extractors used before.
+#
+#   python -m benchmarks.cleaning_throughput --sizes 1 10 50
+import argparse
+import re
+import time
+
+from benchmarks.report import write_report
+from benchmarks.synthetic import act_text, order_text
+from utils.text_cleaner import act_cleaner, order_cleaner
+
+# The old cleaner stopped after 100 of most tags, which makes it look faster than it is
+# on large acts; `count=0` is the same passes run to completion.
+def legacy_act_cleanup(text: str, count: int = 100) -> str:
+    text = re.sub("<Section>", "", text)
+    text = re.sub("</Section>", "", text)
+    text = re.sub("<SubSection>", "\n\t", text, count=count)
+    text = re.sub("</SubSection>", "", text, count=count)
+    text = re.sub("<FNR>", "", text, count=count)
+    text = re.sub("</FNR>", "", text, count=count)
+    text = re.sub("<FN>", "", text, count=count)
+    text = re.sub("</FN>", "", text, count=count)
+    text = re.sub("<FT>", "", text, count=count)
+    text = re.sub("</FT>", "", text, count=count)
+    return text
+
+def legacy_order_cleanup(text: str) -> str:
+    noise_patterns = [
+        r"Downloaded on\s*:\s*.*",
+        r"\bNEUTRAL\s+CITATION\b",
+        r"\bundefined\b",
+        r"CR\.MA\/\d+\/\d+\s+\d+\/\d+\s+JUDGMENT",
+    ]
+    for pattern in noise_patterns:
+        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    text = re.sub(r"\n=+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+def throughput(func, text: str, mb: float) -> tuple[float, str]:
+    start = time.perf_counter()
+    result = func(text)
+    return mb / (time.perf_counter() - start), result
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Text cleaning throughput on synthetic acts and orders")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="document sizes in MB")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'MB':>6} {'doc':>10} {'legacy MB/s':>12} {'engine MB/s':>12} {'tags left (legacy/engine)':>26}")
+    for size in args.sizes:
+        for name, generate, legacy, engine in [
+            ("act", act_text, legacy_act_cleanup, act_cleaner.clean),
+            ("act-full", act_text, lambda text: legacy_act_cleanup(text, count=0), act_cleaner.clean),
+            ("order", order_text, legacy_order_cleanup, order_cleaner.clean),
+        ]:
+            text = generate(int(size * 1024 * 1024))
+            mb = len(text.encode("utf-8")) / (1024 * 1024)
+            legacy_rate, legacy_result = throughput(legacy, text, mb)
+            engine_rate, engine_result = throughput(engine, text, mb)
+            left = f"{legacy_result.count('<')}/{engine_result.count('<')}"
+            print(f"{mb:>6.1f} {name:>10} {legacy_rate:>12.1f} {engine_rate:>12.1f} {left:>26}")
+            results.append({"doc": name, "mb": round(mb, 3), "legacy_mb_per_s": round(legacy_rate, 2), "engine_mb_per_s": round(engine_rate, 2)})
+
+    return write_report(args.output, "cleaning_throughput", vars(args), results)
+
+if __name__ == "__main__":
+    main()
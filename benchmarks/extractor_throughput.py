@@ -0,0 +1,70 @@
+# Extractor throughput, end to end from file to chunks: order PDFs (pdfplumber, the page
+# pool, cleaning and chunking), judgment JSONs and act JSONs, on synthetic documents.
+#
+#   python -m benchmarks.extractor_throughput --sizes 0.1 0.5 2 --output extractors.json
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.report import write_report
+from benchmarks.synthetic import act_text, judgment_json, order_pdf
+
+def run_case(name: str, extract, upload, size: int, pages: int | None = None) -> dict:
+    start = time.perf_counter()
+    chunks = sum(1 for _ in extract(upload))
+    seconds = time.perf_counter() - start
+    mb = size / (1024 * 1024)
+    result = {
+        "case": name,
+        "mb": round(mb, 3),
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(mb / seconds, 3),
+        "chunks": chunks,
+        "chunks_per_s": round(chunks / seconds, 1),
+    }
+    if pages is not None:
+        result["pages"] = pages
+        result["pages_per_s"] = round(pages / seconds, 1)
+    return result
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Extractor throughput on synthetic PDFs and JSONs")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.1, 0.5, 2], help="source text size in MB")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    import pdfplumber
+    from services.extractors import act_extractor, judgement_extractor, order_extractor
+
+    results = []
+    print(f"{'case':>9} {'MB':>7} {'seconds':>8} {'MB/s':>8} {'chunks':>7} {'chunks/s':>9} {'pages/s':>8}")
+    for size in args.sizes:
+        text_size = int(size * 1024 * 1024)
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spool:
+            spool.write(order_pdf(text_size))
+        try:
+            with pdfplumber.open(spool.name) as pdf:
+                pages = len(pdf.pages)
+            results.append(run_case("order_pdf", order_extractor, SimpleNamespace(path=spool.name), os.path.getsize(spool.name), pages))
+        finally:
+            os.remove(spool.name)
+
+        judgment = json.dumps(judgment_json(text_size)).encode("utf-8")
+        results.append(run_case("judgment", judgement_extractor, SimpleNamespace(file=io.BytesIO(judgment)), len(judgment)))
+
+        act = json.dumps({"text": act_text(text_size)}).encode("utf-8")
+        results.append(run_case("act", act_extractor, SimpleNamespace(file=io.BytesIO(act)), len(act)))
+
+        for result in results[-3:]:
+            print(f"{result['case']:>9} {result['mb']:>7.2f} {result['seconds']:>8.3f} {result['mb_per_s']:>8.2f} "
+                  f"{result['chunks']:>7} {result['chunks_per_s']:>9.1f} {result.get('pages_per_s', ''):>8}")
+
+    return write_report(args.output, "extractor_throughput", vars(args), results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# Deterministic stand-ins for Groq, Nomic and Zilliz so benchmarks run offline.
+# install() must run before the services first build their clients (get_llm, get_embedder
+# and get_store build them lazily on first use); running it before importing `app` is
+# simplest. By default the in-process vector store replaces Milvus; store="milvus" keeps
+# MilvusStore and swaps its client for FakeMilvusClient.
+import asyncio
+import hashlib
+import os
+import re
+import time
+
+import numpy as np
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+DIM = 768
+
+# Simulated network latency in seconds, overridable by the benchmarks
+latency = {
+    "llm": 0.25,
+    "embed": 0.05,
+    "milvus": 0.03,
+}
+
+def fake_vector(text: str, dim: int = DIM) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+# <----- LLM ----->
+class FakeChatGroq:
+    def __init__(self, *args, **kwargs):
+        self.model = kwargs.get("model")
+        self.tools = []
+
+    def bind(self, **kwargs):
+        return self
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        bound = FakeChatGroq(model=self.model)
+        bound.tools = list(tools)
+        return bound
+
+    def _generate(self, messages) -> AIMessage:
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages if isinstance(m, dict))
+        content = "" if self.tools else "This is a stubbed answer from the fake LLM."
+        return AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": prompt_tokens, "output_tokens": 10, "total_tokens": prompt_tokens + 10},
+        )
+
+    def invoke(self, input, **kwargs):
+        time.sleep(latency["llm"])
+        return self._generate(input)
+
+    async def ainvoke(self, input, **kwargs):
+        await asyncio.sleep(latency["llm"])
+        return self._generate(input)
+
+    async def astream(self, input, **kwargs):
+        generation = self._generate(input)
+        words = generation.content.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(latency["llm"] / len(words))
+            last = i == len(words) - 1
+            yield AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=generation.usage_metadata if last else None,
+            )
+
+# <----- Embeddings ----->
+class FakeNomicEmbeddings:
+    def __init__(self, *args, **kwargs):
+        self.model = kwargs.get("model")
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(latency["embed"])
+        return [fake_vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(latency["embed"])
+        return fake_vector(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(latency["embed"])
+        return [fake_vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(latency["embed"])
+        return fake_vector(text)
+
+# <----- Milvus ----->
+class FakeIndexParams:
+    def __init__(self):
+        self.indexes = []
+
+    def add_index(self, **kwargs):
+        self.indexes.append(kwargs)
+
+class FakeMilvusClient:
+    def __init__(self, *args, **kwargs):
+        self.collections = {}
+
+    def has_collection(self, collection_name: str, **kwargs) -> bool:
+        return collection_name in self.collections
+
+    def prepare_index_params(self):
+        return FakeIndexParams()
+
+    def create_collection(self, collection_name: str, **kwargs):
+        self.collections.setdefault(collection_name, [])
+
+    def list_collections(self, **kwargs) -> list[str]:
+        return list(self.collections)
+
+    def load_collection(self, collection_name: str, **kwargs):
+        pass
+
+    def drop_collection(self, collection_name: str, **kwargs):
+        self.collections.pop(collection_name, None)
+
+    def describe_collection(self, collection_name: str, **kwargs) -> dict:
+        return {"fields": [{"name": name} for name in ("id", "vector", "text", "sparse", "chunk_hash", "country", "state", "court", "year")]}
+
+    def insert(self, collection_name: str, data: list[dict], **kwargs) -> dict:
+        time.sleep(latency["milvus"])
+        self.collections.setdefault(collection_name, []).extend(data)
+        return {"insert_count": len(data), "ids": [row["id"] for row in data]}
+
+    def upsert(self, collection_name: str, data: list[dict], **kwargs) -> dict:
+        ids = {row["id"] for row in data}
+        self.delete(collection_name, ids=list(ids))
+        response = self.insert(collection_name, data)
+        return {"upsert_count": response["insert_count"]}
+
+    def delete(self, collection_name: str, ids: list[str], **kwargs) -> dict:
+        ids = set(ids)
+        rows = self.collections.get(collection_name, [])
+        self.collections[collection_name] = [row for row in rows if row["id"] not in ids]
+        return {"delete_count": len(rows) - len(self.collections[collection_name])}
+
+    # Understands the two filters insert() sends: `id like "<prefix>%"` and `chunk_hash in [...]`
+    def query(self, collection_name: str, filter: str = "", output_fields=None, **kwargs) -> list[dict]:
+        rows = self.collections.get(collection_name, [])
+        like = re.match(r'id like "(.*)%"$', filter)
+        if like:
+            prefix = re.sub(r"\\(.)", r"\1", like.group(1))
+            rows = [row for row in rows if row["id"].startswith(prefix)]
+        elif filter.startswith("chunk_hash in"):
+            hashes = set(re.findall(r'"([0-9a-f]+)"', filter))
+            rows = [row for row in rows if row.get("chunk_hash") in hashes]
+        return [{field: row.get(field) for field in output_fields or row} for row in rows]
+
+    def query_iterator(self, collection_name: str, filter: str = "", output_fields=None, batch_size: int = 1000, **kwargs):
+        return FakeQueryIterator(self.query(collection_name, filter=filter, output_fields=output_fields), batch_size)
+
+    def hybrid_search(self, collection_name: str, reqs, ranker, limit: int = 10, output_fields=None, **kwargs):
+        time.sleep(latency["milvus"])
+        rows = self.collections.get(collection_name) or [
+            {"id": f"stub_{i}_@_0", "text": f"Stubbed context passage {i}."} for i in range(limit)
+        ]
+        return [[{"id": row["id"], "distance": 1.0 / (rank + 1), "entity": {"id": row["id"], "text": row["text"]}}
+                 for rank, row in enumerate(rows[:limit])]]
+
+class FakeQueryIterator:
+    def __init__(self, rows: list[dict], batch_size: int):
+        self.rows = rows
+        self.batch_size = batch_size
+
+    def next(self) -> list[dict]:
+        batch, self.rows = self.rows[:self.batch_size], self.rows[self.batch_size:]
+        return batch
+
+    def close(self):
+        pass
+
+def install(store: str = "local"):
+    import langchain_groq
+    import langchain_nomic
+
+    langchain_groq.ChatGroq = FakeChatGroq
+    langchain_nomic.NomicEmbeddings = FakeNomicEmbeddings
+    os.environ["VECTOR_STORE"] = store
+    if store == "milvus":
+        import pymilvus
+
+        pymilvus.MilvusClient = FakeMilvusClient
@@ -0,0 +1,38 @@
+# JSON results for the benchmarks, stamped with the commit and machine they ran on so
+# runs can be diffed across commits.
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+    return {"p50": round(pick(0.5), 3), "p95": round(pick(0.95), 3), "p99": round(pick(0.99), 3)}
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> dict:
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def write_report(path: str | None, name: str, settings: dict, results) -> dict:
+    report = {"benchmark": name, "environment": environment(), "settings": settings, "results": results}
+    if path:
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {path}")
+    return report
@@ -0,0 +1,158 @@
+# Recall-vs-latency sweep over search and index profiles.
+#
+# Replays a query set against a collection and, for every combination of M/efConstruction
+# (the index is rebuilt in a scratch collection), ef, per-request limits and RRF k, reports
+# recall@k against an exact brute-force hybrid search plus p50/p95 search latency. The
+# cheapest setting that meets --target-recall is printed as a SEARCH_PROFILES entry.
+#
+#   python -m benchmarks.search_tuning --collection order --queries queries.txt --M 16 32 64 --ef 32 64 128 512
+#   python -m benchmarks.search_tuning --offline
+#
+# Without --queries, the first sentence of randomly sampled chunks is used as the query set.
+# --offline runs on a synthetic corpus and the in-process store, where search is exact, so
+# only the limits and RRF k have an effect there. The exact baseline goes as deep as the
+# largest swept limit unless --truth-depth says otherwise, so the deepest setting in the
+# sweep can reach full recall.
+import argparse
+import itertools
+import json
+import random
+import re
+import time
+
+import numpy as np
+
+from services.local_store import LocalStore
+from services.search_profiles import IndexProfile, SearchProfile, get_search_profile
+from services.vector_store import get_vector_store, normalize_metadata
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def synthetic_corpus(size: int, queries: int, seed: int = 0) -> tuple[list[dict], list[tuple[str, list[float]]]]:
+    from benchmarks.fakes import fake_vector
+    from benchmarks.synthetic import paragraph
+
+    rng = random.Random(seed)
+    rows = []
+    for index in range(size):
+        text = paragraph(rng)
+        rows.append({"id": f"doc{index // 10}_@_{index}", "text": text, "vector": fake_vector(text), "chunk_hash": str(index)})
+    # Queries sit near a chunk in vector space and share a sentence with it
+    noise = np.random.default_rng(seed)
+    query_set = []
+    for row in rng.sample(rows, min(queries, len(rows))):
+        vector = np.asarray(row["vector"]) + 0.6 * noise.standard_normal(len(row["vector"])) / np.sqrt(len(row["vector"]))
+        query_set.append((first_sentence(row["text"]), (vector / np.linalg.norm(vector)).tolist()))
+    return rows, query_set
+
+def first_sentence(text: str) -> str:
+    return re.split(r"(?<=[.!?])\s+", text.strip(), maxsplit=1)[0]
+
+def load_queries(path: str | None, rows: list[dict], count: int, seed: int = 0) -> list[tuple[str, list[float]]]:
+    from services.embedder import search_embeddings
+
+    if path:
+        with open(path) as file:
+            texts = [line.strip() for line in file if line.strip()]
+    else:
+        texts = [first_sentence(row["text"]) for row in random.Random(seed).sample(rows, min(count, len(rows)))]
+    return [(text, search_embeddings(query=text)) for text in texts]
+
+def run_config(store, collection: str, queries: list, truth: list[set], profile: SearchProfile, k: int) -> dict:
+    store.hybrid_search(collection, query=queries[0][0], vector=queries[0][1], limit=k, profile=profile)
+    latencies = []
+    recalls = []
+    for (text, vector), expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = store.hybrid_search(collection, query=text, vector=vector, limit=k, profile=profile)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if expected:
+            recalls.append(len({hit["id"] for hit in hits} & expected) / len(expected))
+    return {
+        "recall": round(sum(recalls) / len(recalls), 4) if recalls else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k vs latency across search and index profiles")
+    parser.add_argument("--collection", default="order")
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--sample-queries", type=int, default=200, help="queries sampled from the collection when --queries is not given")
+    parser.add_argument("--offline", action="store_true", help="synthetic corpus on the in-process store")
+    parser.add_argument("--corpus-size", type=int, default=5000, help="chunks in the --offline corpus")
+    parser.add_argument("--k", type=int, default=5, help="recall@k, also the final search limit")
+    parser.add_argument("--truth-depth", type=int, help="per-request depth of the exact baseline (default: the largest swept limit)")
+    parser.add_argument("--truth-rrf-k", type=int, default=100, help="RRF k of the exact baseline")
+    parser.add_argument("--M", type=int, nargs="+", default=[64])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[256])
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128, 256, 512])
+    parser.add_argument("--dense-limit", type=int, nargs="+", default=[2, 5, 10, 25, 50])
+    parser.add_argument("--sparse-limit", type=int, nargs="+", default=[2, 5, 10, 25, 50])
+    parser.add_argument("--rrf-k", type=int, nargs="+", default=[60, 100])
+    parser.add_argument("--target-recall", type=float, default=0.9)
+    parser.add_argument("--output", help="write every result as JSON")
+    args = parser.parse_args()
+
+    if args.offline:
+        rows, queries = synthetic_corpus(args.corpus_size, args.sample_queries)
+        store = LocalStore()
+    else:
+        store = get_vector_store()
+        rows = [row for batch in store.iter_rows(args.collection) for row in batch]
+        queries = load_queries(args.queries, rows, args.sample_queries)
+    if not rows or not queries:
+        raise SystemExit("Nothing to tune: the collection or the query set is empty")
+    print(f"{len(rows)} chunks, {len(queries)} queries")
+
+    # Exact baseline: brute-force cosine and BM25 over every chunk, fused with RRF
+    baseline = LocalStore(dim=len(rows[0]["vector"]))
+    baseline.upsert("baseline", rows)
+    truth_depth = args.truth_depth or max(args.dense_limit + args.sparse_limit)
+    truth_profile = SearchProfile(dense_limit=truth_depth, sparse_limit=truth_depth, rrf_k=args.truth_rrf_k, limit=args.k)
+    truth = [{hit["id"] for hit in baseline.hybrid_search("baseline", query=text, vector=vector, profile=truth_profile)} for text, vector in queries]
+
+    index_profiles = [IndexProfile(M=M, ef_construction=ef_construction) for M, ef_construction in itertools.product(args.M, args.ef_construction)]
+    if isinstance(store, LocalStore):
+        # Exact search: index settings and ef change nothing
+        index_profiles = index_profiles[:1]
+        args.ef = args.ef[:1]
+
+    results = []
+    print(f"{'M':>4} {'efC':>5} {'ef':>5} {'dense':>6} {'sparse':>7} {'rrf_k':>6} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for index_profile in index_profiles:
+        collection = f"{args.collection}_tune_m{index_profile.M}_efc{index_profile.ef_construction}"
+        created = store.create_collection(collection, index_profile=index_profile)
+        if created["status"] != 200:
+            raise SystemExit(f"Could not create {collection}: {created['message']}")
+        try:
+            for start in range(0, len(rows), 500):
+                store.upsert(collection, [{**normalize_metadata(row), **row} for row in rows[start:start + 500]])
+            for ef, dense_limit, sparse_limit, rrf_k in itertools.product(args.ef, args.dense_limit, args.sparse_limit, args.rrf_k):
+                profile = SearchProfile(ef=ef, dense_limit=dense_limit, sparse_limit=sparse_limit, rrf_k=rrf_k, limit=args.k)
+                result = {"M": index_profile.M, "ef_construction": index_profile.ef_construction, "ef": ef, "dense_limit": dense_limit, "sparse_limit": sparse_limit, "rrf_k": rrf_k}
+                result.update(run_config(store, collection, queries, truth, profile, args.k))
+                results.append(result)
+                print(f"{index_profile.M:>4} {index_profile.ef_construction:>5} {ef:>5} {dense_limit:>6} {sparse_limit:>7} {rrf_k:>6} {result['recall']:>10.4f} {result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f}")
+        finally:
+            store.drop_collection(collection)
+
+    current = get_search_profile(args.collection)
+    print(f"Current profile for {args.collection}: {current}")
+    passing = [result for result in results if result["recall"] >= args.target_recall]
+    if passing:
+        best = min(passing, key=lambda result: (result["p95_ms"], result["ef"], result["M"], result["dense_limit"] + result["sparse_limit"]))
+        settings = {key: best[key] for key in ("M", "ef_construction", "ef", "dense_limit", "sparse_limit", "rrf_k")}
+        print(f"Cheapest setting with recall@{args.k} >= {args.target_recall}: recall {best['recall']}, p95 {best['p95_ms']} ms")
+        print("SEARCH_PROFILES=" + json.dumps({args.collection: settings}))
+    else:
+        print(f"No setting reached recall@{args.k} >= {args.target_recall}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Synthetic legal text for the offline benchmarks. Everything is seeded, so runs are comparable.
+import random
+
+WORDS = (
+    "the petitioner respondent court held that section order rule act appeal bail "
+    "judgment decree suit evidence witness property tenancy notice hearing counsel "
+    "learned high supreme tribunal application dismissed allowed interim injunction "
+    "limitation possession contract agreement liability compensation proceedings"
+).split()
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(2, 8)))
+
+def judgment_text(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        part = paragraph(rng)
+        parts.append(part)
+        total += len(part) + 1
+    return "\n".join(parts)[:size]
+
+def judgment_json(size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < size:
+        subparagraphs = [{"Text": paragraph(rng), "IsSub": rng.random() < 0.3} for _ in range(rng.randint(1, 4))]
+        total += sum(len(sub["Text"]) for sub in subparagraphs)
+        paragraphs.append({"SubParagraphs": subparagraphs})
+    return {
+        "Title": "State of Gujarat v. Synthetic Respondent",
+        "Country": {"Name": "India"},
+        "Court": {"Name": "Gujarat High Court", "Type": "High Court"},
+        "JudgmentDate": "2023-05-17",
+        "Judges": ["Justice A", "Justice B"],
+        "References": [{"Title": f"Reference {i}", "Citation": f"2020 SCC {i}", "CaseType": "Civil"} for i in range(200)],
+        "JudgementText": {"Paragraphs": paragraphs},
+    }
+
+def act_text(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    section = 1
+    while total < size:
+        subsections = "".join(f"<SubSection>({i}) {sentence(rng)}</SubSection>" for i in range(1, rng.randint(2, 6)))
+        footnote = f"<FNR>{section}</FNR><FN><FT>Subs. by Act {rng.randint(1, 60)} of {rng.randint(1950, 2023)}.</FT></FN>" if rng.random() < 0.4 else ""
+        part = f"<Section>{section}. {sentence(rng)}{subsections}{footnote}</Section>\n"
+        parts.append(part)
+        total += len(part)
+        section += 1
+    return "".join(parts)
+
+def order_text(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["IN THE HIGH COURT OF GUJARAT AT AHMEDABAD\nNEUTRAL CITATION\nDate : 17/05/2023\n"]
+    total = len(parts[0])
+    page = 1
+    while total < size:
+        part = (f"{paragraph(rng)}\n\n\n{paragraph(rng)}\n==========\n"
+                f"CR.MA/{page}/2023 {page}/99 JUDGMENT\nundefined\nDownloaded on : 20/05/2023 10:{page % 60:02d}:00 pm")
+        parts.append(part)
+        total += len(part)
+        page += 1
+    return "".join(parts)
+
+# <----- Minimal PDF ----->
+# Just enough PDF for pdfplumber: one Helvetica text object per page, lines wrapped at
+# PDF_LINE_CHARS and PDF_PAGE_LINES lines to a page.
+PDF_LINE_CHARS = 95
+PDF_PAGE_LINES = 60
+
+def wrap_lines(text: str, width: int = PDF_LINE_CHARS) -> list[str]:
+    lines = []
+    for raw in text.split("\n"):
+        line = ""
+        for word in raw.split(" "):
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+    return lines
+
+def pdf_escape(line: str) -> str:
+    return line.encode("latin-1", "replace").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def pdf_bytes(text: str) -> bytes:
+    lines = wrap_lines(text)
+    pages = [lines[start:start + PDF_PAGE_LINES] for start in range(0, len(lines), PDF_PAGE_LINES)] or [[]]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for page in pages:
+        body = "BT /F1 9 Tf 12 TL 40 780 Td " + " ".join(f"({pdf_escape(line)}) Tj T*" for line in page) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+def order_pdf(size: int, seed: int = 0) -> bytes:
+    return pdf_bytes(order_text(size, seed))
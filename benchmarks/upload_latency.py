@@ -0,0 +1,74 @@
+# /upload latency by document size against stubbed Nomic and the in-process vector store:
+# time until the 202 comes back, and time until the ingestion job reports done.
+#
+#   python -m benchmarks.upload_latency --sizes 0.05 0.2 1 --repeat 3 --output upload.json
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import fakes
+from benchmarks.report import percentiles, write_report
+from benchmarks.synthetic import judgment_json, order_pdf
+
+async def upload(http, category: str, file_name: str, body: bytes, content_type: str) -> dict:
+    start = time.perf_counter()
+    response = await http.post("/upload", data={"category": category}, files={"file": (file_name, body, content_type)})
+    accepted = time.perf_counter() - start
+    response.raise_for_status()
+    job = response.json()
+    while job["stage"] not in ("done", "failed"):
+        await asyncio.sleep(0.01)
+        job = (await http.get(f"/jobs/{job['job_id']}")).json()
+    if job["stage"] == "failed":
+        raise RuntimeError(f"Ingestion of {file_name} failed: {job['error']}")
+    return {"accepted_ms": accepted * 1000, "done_ms": (time.perf_counter() - start) * 1000, "chunks": job["chunks"]}
+
+async def run(app, sizes: list[float], repeat: int) -> list[dict]:
+    import httpx
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            for size in sizes:
+                text_size = int(size * 1024 * 1024)
+                cases = [
+                    ("order_pdf", "pdf", "application/pdf", lambda seed: order_pdf(text_size, seed)),
+                    ("judgment", "json", "application/json", lambda seed: json.dumps(judgment_json(text_size, seed)).encode("utf-8")),
+                ]
+                for name, extension, content_type, build in cases:
+                    runs = []
+                    for seed in range(repeat):
+                        # A new seed per run, so every upload embeds and writes all of its chunks
+                        body = build(seed)
+                        runs.append(await upload(http, "order", f"bench_{name}_{size}_{seed}.{extension}", body, content_type))
+                    result = {
+                        "case": name,
+                        "mb": round(len(body) / (1024 * 1024), 3),
+                        "chunks": runs[-1]["chunks"],
+                        "accepted_ms": percentiles([run["accepted_ms"] for run in runs]),
+                        "done_ms": percentiles([run["done_ms"] for run in runs]),
+                    }
+                    results.append(result)
+                    print(f"{name:>9} {result['mb']:>7.2f} {result['chunks']:>7} {result['accepted_ms']['p50']:>12.1f} {result['done_ms']['p50']:>10.1f}")
+    return results
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="/upload latency by document size")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.05, 0.2, 1], help="source text size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--embed-latency", type=float, default=fakes.latency["embed"])
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    fakes.latency.update(embed=args.embed_latency)
+    fakes.install()
+    from app import app
+
+    print(f"{'case':>9} {'MB':>7} {'chunks':>7} {'accepted p50':>12} {'done p50':>10}")
+    results = asyncio.run(run(app, args.sizes, args.repeat))
+    return write_report(args.output, "upload_latency", vars(args), results)
+
+if __name__ == "__main__":
+    main()
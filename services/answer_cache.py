@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import copy
+import itertools
+import json
+import os
+import threading
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# <----- Semantic Answer Cache ----->
+# Paraphrases of an already answered question hit when the query embeddings are close
+# enough AND the hybrid search retrieved the same chunks under the same filters, so an
+# answer is never reused against different context. Entries are dropped whenever their
+# collection changes.
+def filters_key(filters: dict | None) -> str:
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+class AnswerCache:
+    def __init__(self, maxsize: int = 512, threshold: float = 0.95):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._by_intent = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, intent: str, vector: list[float], ids: list[str], filters: dict | None = None) -> list | None:
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        wanted = (frozenset(ids), filters_key(filters))
+        with self._lock:
+            keys = list(self._by_intent.get(intent, ()))
+            if keys:
+                matrix = np.stack([self._entries[key][0] for key in keys])
+                scores = matrix @ query
+                for position in np.argsort(-scores):
+                    if scores[position] < self.threshold:
+                        break
+                    key = keys[position]
+                    _, entry_key, payload = self._entries[key]
+                    if entry_key == wanted:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return copy.deepcopy(payload)
+            self.misses += 1
+            return None
+
+    def put(self, intent: str, vector: list[float], ids: list[str], payload: list, filters: dict | None = None):
+        entry = np.asarray(vector, dtype=np.float32)
+        entry = entry / (np.linalg.norm(entry) or 1.0)
+        with self._lock:
+            key = next(self._ids)
+            self._entries[key] = (entry, (frozenset(ids), filters_key(filters)), copy.deepcopy(payload))
+            self._by_intent.setdefault(intent, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                for keys in self._by_intent.values():
+                    keys.discard(old_key)
+
+    def invalidate(self, intent: str):
+        with self._lock:
+            for key in self._by_intent.pop(intent, set()):
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_intent.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+answer_cache = AnswerCache(
+    maxsize=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+)
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from services.prompts import Prompt
+from services.tools import followup_handler
+from services.milvus_services import asearch, afanout_search, fanout_collections, FANOUT_INTENT
+from services.embedder import asearch_embeddings
+from services.answer_cache import answer_cache
+from services.vector_store import normalize_text
+from services.context_builder import compact_history
+from services.followup_classifier import classify, record, SKIP
+from services.llm_response import allm, astream_llm
+from utils.llm_scheduler import llm_scheduler
+from utils.observability import span
+from utils.singleflight import SingleFlight, flight_key
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+NO_CONTEXT_RESPONSE = "Sorry, but I couldn't find any relevant information related to your query. Kindly provide additional details or clarify your request so I may assist you accurately."
+
+# <----- Followup Rewrite ----->
+async def rewrite_query(query: str, chat_history: list[dict]) -> tuple[str, int]:
+    with span("rewrite") as attrs:
+        toolprompt={"role":"user","content":Prompt.followup_prompt(query=query)}
+        chat_history.append(toolprompt)
+        listres=await llm_scheduler.ainvoke(chat_history, priority="rewrite", tools=(followup_handler,))
+        chat_history.pop()
+        chat_history.pop()
+        list_token=0
+        if(listres.tool_calls):
+            list_token=listres.usage_metadata["total_tokens"]
+            if(listres.tool_calls[0]['name']=="followup_handler"):
+                query=listres.tool_calls[0]['args']['query']
+                attrs["rewritten"] = True
+                logger.info("Restructured Query: %s", query)
+        attrs["tokens"] = list_token
+    return query, list_token
+
+# <----- Retrieval ----->
+# Most rewrite calls come back without a tool call, so with SPECULATIVE_SEARCH on the
+# hybrid search for the raw query runs while the rewrite is in flight and is only
+# thrown away when the query actually gets rewritten.
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "true").lower() == "true"
+
+speculation_stats = {"speculated": 0, "used": 0, "discarded": 0}
+
+def get_speculation_stats() -> dict:
+    speculated = speculation_stats["speculated"]
+    return {**speculation_stats, "hit_rate": round(speculation_stats["used"] / speculated, 4) if speculated else 0.0}
+
+def _consume_result(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+# A missing or mixed intent searches every collection instead of one
+async def search_intent(query: str, current_intent, filters: dict | None = None):
+    collections = fanout_collections(current_intent)
+    if collections:
+        return await afanout_search(query=query, collections=collections, filters=filters)
+    return await asearch(query=query,collection=current_intent, filters=filters)
+
+def cache_intent(current_intent) -> str:
+    return FANOUT_INTENT if fanout_collections(current_intent) else current_intent
+
+# Every fan-out intent shares the "all" cache entries, so a hit takes this request's
+# intent (copied, never the caller's list) and tokens instead of the first writer's
+def from_cache(cached: list, list_token: int, current_intent) -> list:
+    cached[1] = list_token
+    cached[2] = list(current_intent) if isinstance(current_intent, list) else current_intent
+    return cached
+
+# The last chat_history message is the current query (rewrite_query pops it too),
+# so only the messages before it count as conversation to follow up on.
+async def retrieve(query: str, chat_history: list[dict], current_intent: str, filters: dict | None = None):
+    with span("classify") as attrs:
+        decision, reason = classify(query=query, history=chat_history[:-1])
+        attrs.update(decision=decision, reason=reason)
+    record(decision, reason)
+    if decision == SKIP:
+        if chat_history:
+            chat_history.pop()
+        return query, 0, await search_intent(query=query, current_intent=current_intent, filters=filters)
+
+    if not SPECULATIVE_SEARCH:
+        query, list_token = await rewrite_query(query=query, chat_history=chat_history)
+        return query, list_token, await search_intent(query=query, current_intent=current_intent, filters=filters)
+
+    speculative = asyncio.create_task(search_intent(query=query, current_intent=current_intent, filters=filters))
+    speculative.add_done_callback(_consume_result)
+    speculation_stats["speculated"] += 1
+    try:
+        rewritten, list_token = await rewrite_query(query=query, chat_history=chat_history)
+    except BaseException:
+        speculative.cancel()
+        raise
+
+    if rewritten == query:
+        speculation_stats["used"] += 1
+        return query, list_token, await speculative
+
+    speculative.cancel()
+    speculation_stats["discarded"] += 1
+    return rewritten, list_token, await search_intent(query=rewritten, current_intent=current_intent, filters=filters)
+
+# <----- Chat ----->
+# The history is compacted before anything is sent to Groq. Estimated prompt tokens saved
+# by compaction and by context packing come back as a usage dict, the last response item.
+def token_usage(context, history_saved: int) -> dict:
+    usage = {"context_tokens": 0, "context_tokens_saved": 0, "duplicate_chunks": 0, "dropped_chunks": 0}
+    if context:
+        usage.update(context[2])
+    usage["history_tokens_saved"] = history_saved
+    usage["tokens_saved"] = usage["context_tokens_saved"] + history_saved
+    return usage
+
+# Duplicate /chat requests in flight together (same normalized query, intent, filters and
+# history) share one rewrite, search and generation
+chat_flight = SingleFlight("chat")
+
+def chat_key(query: str, chat_history: list[dict], current_intent, filters: dict | None) -> str:
+    history = [(message.get("role"), normalize_text(message.get("content"))) for message in chat_history]
+    return flight_key("chat", normalize_text(query), current_intent, filters, history)
+
+async def answer(query: str, chat_history: list[dict], current_intent: str, filters: dict | None = None) -> list:
+    key = chat_key(query=query, chat_history=chat_history, current_intent=current_intent, filters=filters)
+    return await chat_flight.do(key, lambda: generate_answer(query=query, chat_history=chat_history, current_intent=current_intent, filters=filters))
+
+async def generate_answer(query: str, chat_history: list[dict], current_intent: str, filters: dict | None = None) -> list:
+    chat_history, history_saved = compact_history(chat_history)
+    query, list_token, context = await retrieve(query=query, chat_history=chat_history, current_intent=current_intent, filters=filters)
+    usage = token_usage(context, history_saved)
+    if(context):
+        ids=context[1]
+        # Same embedding that search() just used, so this is a query-cache hit
+        vector = await asearch_embeddings(query=query)
+        cached = answer_cache.get(intent=cache_intent(current_intent), vector=vector, ids=context[3], filters=filters)
+        if cached:
+            # Only the rewrite step spent tokens on this request
+            return from_cache(cached, list_token, current_intent) + [usage]
+        with span("generate") as attrs:
+            response = await allm(query=query,chat_history=chat_history, context=context[0])
+            attrs["tokens"] = response[1]
+        response=list(response)
+        answer_cache.put(intent=cache_intent(current_intent), vector=vector, ids=context[3], payload=response + [current_intent, ids], filters=filters)
+        response[1] = response [1]  + list_token
+        response.append(current_intent)
+        response.append(ids)
+        response.append(usage)
+        return response
+    return [NO_CONTEXT_RESPONSE,list_token,current_intent,[],usage]
+
+# Yields ("token", text) for every generated piece, then ("end", payload) where
+# payload is the same [answer, tokens, intent, ids, usage] list that answer() returns.
+async def stream_answer(query: str, chat_history: list[dict], current_intent: str, filters: dict | None = None):
+    chat_history, history_saved = compact_history(chat_history)
+    query, list_token, context = await retrieve(query=query, chat_history=chat_history, current_intent=current_intent, filters=filters)
+    usage = token_usage(context, history_saved)
+    if not context:
+        yield "token", NO_CONTEXT_RESPONSE
+        yield "end", [NO_CONTEXT_RESPONSE,list_token,current_intent,[],usage]
+        return
+
+    vector = await asearch_embeddings(query=query)
+    cached = answer_cache.get(intent=cache_intent(current_intent), vector=vector, ids=context[3], filters=filters)
+    if cached:
+        cached = from_cache(cached, list_token, current_intent)
+        yield "token", cached[0]
+        yield "end", cached + [usage]
+        return
+
+    generation = None
+    with span("generate", stream=True) as attrs:
+        async for chunk in astream_llm(query=query, chat_history=chat_history, context=context[0]):
+            generation = chunk if generation is None else generation + chunk
+            if chunk.content:
+                yield "token", chunk.content
+
+        response = generation.content if generation else ""
+        tokens = generation.usage_metadata["total_tokens"] if generation and generation.usage_metadata else 0
+        attrs["tokens"] = tokens
+    answer_cache.put(intent=cache_intent(current_intent), vector=vector, ids=context[3], payload=[response, tokens, current_intent, context[1]], filters=filters)
+    yield "end", [response, tokens + list_token, current_intent, context[1], usage]
@@ -0,0 +1,113 @@
+import os
+
+from dotenv import load_dotenv
+
+from utils.chunker import count_tokens, split_sentences
+
+load_dotenv()
+
+# <----- Context Packing ----->
+# Hits are taken in rank order. Sentences already in the context (the overlap neighbouring
+# chunks share, or a chunk retrieved twice) are dropped, a chunk that is mostly repeats
+# is skipped, and chunks are packed until CONTEXT_TOKEN_BUDGET is spent.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_DUPLICATE_RATIO = float(os.getenv("CONTEXT_DUPLICATE_RATIO", "0.8"))
+CONTEXT_MIN_DEDUP_WORDS = 4
+
+def sentence_key(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+def fit_sentences(sentences: list[str], budget: int) -> str:
+    fitted = []
+    size = 0
+    for sentence in sentences:
+        tokens = count_tokens(sentence)
+        if size + tokens > budget:
+            break
+        fitted.append(sentence)
+        size += tokens
+    return " ".join(fitted)
+
+def pack_context(documents: list[dict], budget: int = CONTEXT_TOKEN_BUDGET) -> tuple[list[dict], dict]:
+    seen = set()
+    packed = []
+    used = 0
+    usage = {"context_tokens": 0, "context_tokens_saved": 0, "duplicate_chunks": 0, "dropped_chunks": 0}
+    for doc in documents:
+        text = doc.get("text") or ""
+        original = count_tokens(text)
+        sentences = [sentence for sentence in split_sentences(text) if sentence.strip()]
+        kept = []
+        for sentence in sentences:
+            key = sentence_key(sentence)
+            if len(key.split()) >= CONTEXT_MIN_DEDUP_WORDS and key in seen:
+                continue
+            kept.append(sentence)
+        kept_text = " ".join(kept) if len(kept) < len(sentences) else text
+        tokens = count_tokens(kept_text)
+        if not tokens or tokens < original * (1 - CONTEXT_DUPLICATE_RATIO):
+            usage["duplicate_chunks"] += 1
+            usage["context_tokens_saved"] += original
+            continue
+        if not packed and tokens > budget:
+            # The best hit alone is over budget: keep its leading sentences rather than nothing
+            kept_text = fit_sentences(kept, budget)
+            tokens = count_tokens(kept_text)
+        if not tokens or used + tokens > budget:
+            usage["dropped_chunks"] += 1
+            usage["context_tokens_saved"] += original
+            continue
+        seen.update(sentence_key(sentence) for sentence in kept)
+        packed.append({**doc, "text": kept_text})
+        used += tokens
+        usage["context_tokens_saved"] += original - tokens
+    usage["context_tokens"] = used
+    return packed, usage
+
+# <----- History Compaction ----->
+# The last HISTORY_KEEP_TURNS exchanges (plus the current message) are sent verbatim.
+# Older messages are dropped, or with HISTORY_COMPACTION=summarize replaced by one short
+# note listing the earlier questions, newest first, within HISTORY_SUMMARY_TOKENS.
+HISTORY_COMPACTION = os.getenv("HISTORY_COMPACTION", "summarize")
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "3"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "200"))
+HISTORY_QUESTION_TOKENS = 40
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(str(message.get("content") or ""))
+
+def summarize_history(messages: list[dict]) -> dict | None:
+    questions = []
+    size = 0
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        question = " ".join(str(message.get("content") or "").split())
+        if count_tokens(question) > HISTORY_QUESTION_TOKENS:
+            question = next(split_sentences(question))
+        tokens = count_tokens(question)
+        if not tokens or size + tokens > HISTORY_SUMMARY_TOKENS:
+            break
+        questions.append(question)
+        size += tokens
+    if not questions:
+        return None
+    return {"role": "system", "content": "Earlier in this conversation the user asked (most recent first): " + " | ".join(questions)}
+
+def compact_history(chat_history: list[dict]) -> tuple[list[dict], int]:
+    if HISTORY_COMPACTION == "off":
+        return list(chat_history), 0
+    users = 0
+    start = 0
+    for index in range(len(chat_history) - 1, -1, -1):
+        if chat_history[index].get("role") == "user":
+            users += 1
+            if users == HISTORY_KEEP_TURNS + 1:
+                start = index
+                break
+    older = chat_history[:start]
+    if not older:
+        return list(chat_history), 0
+    summary = summarize_history(older) if HISTORY_COMPACTION == "summarize" else None
+    saved = sum(message_tokens(message) for message in older) - (message_tokens(summary) if summary else 0)
+    return ([summary] if summary else []) + chat_history[start:], max(saved, 0)
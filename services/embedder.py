@@ -1,22 +1,115 @@
 # from langchain_ollama import OllamaEmbeddings
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
-from langchain_nomic import NomicEmbeddings
+from utils.cache import TTLCache
+from utils.chunker import chunk_fingerprint
+from utils.singleflight import SingleFlight
+from services.embedding_store import embedding_store
+from services.embedding_executor import EmbeddingExecutor
 
 load_dotenv()
 
+EMBEDDING_MODEL = "nomic-embed-text-v1.5"
+
 # embedder = OllamaEmbeddings(model="nomic-embed-text", base_url=os.getenv("OLLAMA_BASE_URL"))
 # embedder = OllamaEmbeddings(model="jina/jina-embeddings-v2-base-en", base_url=os.getenv("OLLAMA_BASE_URL"))
-embedder=NomicEmbeddings(model="nomic-embed-text-v1.5",nomic_api_key=os.getenv("NOMIC_API_KEY"))
 
-def generate_embeddings(chunks: list[str]):
-    embeddings = embedder.embed_documents(texts=chunks)
-    return embeddings
+# Built on first use rather than at import, so the app starts without touching the network
+_embedder = None
+_embedder_lock = threading.Lock()
+
+def get_embedder():
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            from langchain_nomic import NomicEmbeddings
+
+            _embedder=NomicEmbeddings(model=EMBEDDING_MODEL,nomic_api_key=os.getenv("NOMIC_API_KEY"))
+        return _embedder
+
+embedding_executor = EmbeddingExecutor(
+    embed=lambda texts: get_embedder().embed_documents(texts=texts),
+    batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+    min_batch_size=int(os.getenv("EMBED_MIN_BATCH_SIZE", "4")),
+    max_batch_size=int(os.getenv("EMBED_MAX_BATCH_SIZE", "256")),
+    concurrency=int(os.getenv("EMBED_CONCURRENCY", "4")),
+    rate_limit=float(os.getenv("EMBED_RATE_LIMIT", "0")),
+    max_retries=int(os.getenv("EMBED_MAX_RETRIES", "4")),
+    backoff=float(os.getenv("EMBED_BACKOFF", "0.5")),
+    target_latency=float(os.getenv("EMBED_TARGET_LATENCY", "2.0")),
+)
+
+# Popular questions repeat a lot, so query embeddings are cached on model + normalized query
+query_cache = TTLCache(
+    maxsize=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("EMBEDDING_CACHE_TTL", "86400")),
+    path=os.getenv("EMBEDDING_CACHE_PATH"),
+    disk_maxsize=int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", "100000")),
+)
+
+def query_cache_key(query: str) -> str:
+    return f"{EMBEDDING_MODEL}:{' '.join(query.split()).casefold()}"
+
+# Cache misses for the same query that arrive together share one Nomic call
+embed_flight = SingleFlight("embed")
+
+# <----- Document Embeddings ----->
+# With EMBEDDING_STORE_DIR set, vectors are looked up locally by chunk hash first and
+# only the misses go to Nomic; everything Nomic returns is kept for next time.
+def stored_embeddings(hashes: list[str]) -> dict[str, list[float]]:
+    if embedding_store is None:
+        return {}
+    return embedding_store.get_many(EMBEDDING_MODEL, hashes)
+
+def remember_embeddings(embeddings: dict[str, list[float]]):
+    if embedding_store is not None:
+        embedding_store.put_many(EMBEDDING_MODEL, embeddings)
+
+# lookup=False is for callers that already looked the hashes up (and counted the misses)
+def generate_embeddings(chunks: list[str], hashes: list[str] | None = None, lookup: bool = True):
+    if embedding_store is None:
+        embeddings = embedding_executor.embed(chunks)
+        return embeddings
+
+    hashes = hashes or [chunk_fingerprint(chunk) for chunk in chunks]
+    stored = stored_embeddings(hashes) if lookup else {}
+    missing = {chunk_hash: chunk for chunk_hash, chunk in zip(hashes, chunks) if chunk_hash not in stored}
+    if missing:
+        embeddings = embedding_executor.embed(list(missing.values()))
+        fresh = dict(zip(missing, embeddings))
+        remember_embeddings(fresh)
+        stored.update(fresh)
+    return [stored[chunk_hash] for chunk_hash in hashes]
 
 def search_embeddings(query: str) -> list[float]:
-    embeddings = embedder.embed_query(text=query)
+    key = query_cache_key(query)
+    embeddings = query_cache.get(key)
+    if embeddings is None:
+        embeddings = get_embedder().embed_query(text=query)
+        query_cache.set(key, embeddings)
+    return embeddings
+
+# With EMBEDDING_CACHE_PATH set, the SQLite tier is only touched from a worker thread,
+# never on the event loop
+async def _embed_query(query: str, key: str) -> list[float]:
+    embeddings = await get_embedder().aembed_query(text=query)
+    if query_cache.persistent:
+        await asyncio.to_thread(query_cache.set, key, embeddings)
+    else:
+        query_cache.set(key, embeddings)
+    return embeddings
+
+async def asearch_embeddings(query: str) -> list[float]:
+    key = query_cache_key(query)
+    embeddings = query_cache.get(key, disk=False)
+    if embeddings is None and query_cache.persistent:
+        embeddings = await asyncio.to_thread(query_cache.get, key)
+    if embeddings is None:
+        embeddings = await embed_flight.do(key, lambda: _embed_query(query, key))
     return embeddings
 
 def text_from_embeddings(embeddings: list[float]) -> str:
-    text = embedder(text=embeddings)
+    text = get_embedder()(text=embeddings)
     return text
\ No newline at end of file
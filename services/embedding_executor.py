@@ -0,0 +1,121 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# <----- Rate Limiter ----->
+# Token bucket shared by every embedding thread; `rate` is requests per second, 0 disables it.
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# <----- Embedding Executor ----->
+# Splits texts into batches and embeds up to `concurrency` of them at once. Each batch
+# is retried with exponential backoff and jitter. The batch size adapts as it goes: it
+# halves when a batch fails and grows again while batches come back under the target
+# latency. Results always come back in input order.
+class EmbeddingExecutor:
+    def __init__(self, embed, batch_size: int = 32, min_batch_size: int = 4, max_batch_size: int = 256,
+                 concurrency: int = 4, rate_limit: float = 0, max_retries: int = 4, backoff: float = 0.5,
+                 target_latency: float = 2.0):
+        self.embed_batch = embed
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.target_latency = target_latency
+        self.limiter = RateLimiter(rate_limit)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.batches = 0
+        self.texts = 0
+        self.retries = 0
+        self.failures = 0
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        futures = []
+        position = 0
+        while position < len(texts):
+            self._slots.acquire()
+            with self._lock:
+                size = self.batch_size
+            batch = texts[position:position + size]
+            future = self._pool.submit(self._run, batch)
+            future.add_done_callback(lambda _: self._slots.release())
+            futures.append(future)
+            position += len(batch)
+
+        embeddings = []
+        for future in futures:
+            embeddings.extend(future.result())
+        return embeddings
+
+    def _run(self, batch: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                embeddings = self.embed_batch(batch)
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                    self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("Embedding batch of %d failed (%s), retry %d/%d", len(batch), e, attempt + 1, self.max_retries)
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.backoff * 2 ** attempt + random.uniform(0, self.backoff))
+                continue
+
+            latency = time.perf_counter() - start
+            with self._lock:
+                self.latencies.append(latency)
+                self.batches += 1
+                self.texts += len(batch)
+                if latency < self.target_latency and len(batch) == self.batch_size:
+                    self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 2))
+            return embeddings
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "batch_size": self.batch_size,
+                "batches": self.batches,
+                "texts": self.texts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "p50_batch_seconds": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "p95_batch_seconds": round(latencies[int(len(latencies) * 0.95)], 3) if latencies else None,
+            }
@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+import os
+import re
+import sqlite3
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# <----- Local Embedding Store ----->
+# Document vectors keyed by (model, chunk hash), so rebuilding a collection never pays
+# Nomic again for text it has already embedded. Vectors are appended as float32 rows to
+# one file per model and read back through np.memmap; a SQLite index maps each hash to
+# its row. Overwritten or discarded rows stay in the file until compact() rewrites it.
+# Several workers or ingestion processes may share one directory: writers hold an
+# exclusive flock on <directory>/.lock from picking the next row to committing the index,
+# readers a shared one. Without fcntl (Windows) the store is single-process only.
+class EmbeddingStore:
+    def __init__(self, directory: str, dim: int = 768):
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._lock_file = open(os.path.join(directory, ".lock"), "a+")
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        with self._locked(exclusive=True):
+            self._db.execute("CREATE TABLE IF NOT EXISTS vectors (model TEXT, hash TEXT, row INTEGER, PRIMARY KEY (model, hash))")
+            self._db.commit()
+        self._maps = {}
+        self.hits = 0
+        self.misses = 0
+
+    # Thread lock for this process, then the file lock shared with other processes
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _path(self, model: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", model) + ".f32")
+
+    def _rows(self, model: str) -> int:
+        path = self._path(model)
+        return os.path.getsize(path) // (self.dim * 4) if os.path.exists(path) else 0
+
+    # Re-mapped when the file grew or another process compacted it into a new file
+    def _matrix(self, model: str, needed_rows: int):
+        path = self._path(model)
+        inode = os.stat(path).st_ino if os.path.exists(path) else None
+        matrix, mapped_inode = self._maps.get(model, (None, None))
+        if matrix is None or len(matrix) < needed_rows or mapped_inode != inode:
+            rows = self._rows(model)
+            matrix = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
+            self._maps[model] = (matrix, inode)
+        return matrix
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        if not hashes:
+            return {}
+        with self._locked(exclusive=False):
+            found = {}
+            for start in range(0, len(hashes), 500):
+                part = hashes[start:start + 500]
+                placeholders = ", ".join("?" for _ in part)
+                found.update(self._db.execute(
+                    f"SELECT hash, row FROM vectors WHERE model = ? AND hash IN ({placeholders})", (model, *part)
+                ).fetchall())
+            matrix = self._matrix(model, max(found.values()) + 1) if found else None
+            vectors = {chunk_hash: matrix[row].tolist() for chunk_hash, row in found.items()}
+            self.hits += len(vectors)
+            self.misses += len(set(hashes)) - len(vectors)
+            return vectors
+
+    def put_many(self, model: str, items: dict[str, list[float]]):
+        if not items:
+            return
+        matrix = np.asarray(list(items.values()), dtype=np.float32).reshape(-1, self.dim)
+        with self._locked(exclusive=True):
+            first_row = self._rows(model)
+            with open(self._path(model), "ab") as vectors_file:
+                vectors_file.write(matrix.tobytes())
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (model, hash, row) VALUES (?, ?, ?)",
+                [(model, chunk_hash, first_row + i) for i, chunk_hash in enumerate(items)],
+            )
+            self._db.commit()
+
+    def discard(self, model: str, hashes: list[str]):
+        with self._locked(exclusive=True):
+            self._db.executemany("DELETE FROM vectors WHERE model = ? AND hash = ?", [(model, h) for h in hashes])
+            self._db.commit()
+
+    # Rewrites the model's file with only the rows the index still points at
+    def compact(self, model: str) -> dict:
+        with self._locked(exclusive=True):
+            entries = self._db.execute("SELECT hash, row FROM vectors WHERE model = ? ORDER BY row", (model,)).fetchall()
+            before = self._rows(model)
+            matrix = self._matrix(model, before)
+            path = self._path(model)
+            with open(path + ".compact", "wb") as compacted:
+                for chunk_hash, row in entries:
+                    compacted.write(np.asarray(matrix[row], dtype=np.float32).tobytes())
+            self._maps.pop(model, None)
+            del matrix
+            os.replace(path + ".compact", path)
+            self._db.executemany(
+                "UPDATE vectors SET row = ? WHERE model = ? AND hash = ?",
+                [(new_row, model, chunk_hash) for new_row, (chunk_hash, _) in enumerate(entries)],
+            )
+            self._db.commit()
+            return {"rows_before": before, "rows_after": len(entries)}
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "vectors": self._db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+embedding_store = EmbeddingStore(os.getenv("EMBEDDING_STORE_DIR")) if os.getenv("EMBEDDING_STORE_DIR") else None
+
+if __name__ == "__main__":
+    import sys
+    if embedding_store is None:
+        sys.exit("EMBEDDING_STORE_DIR is not set")
+    for model in sys.argv[1:] or ["nomic-embed-text-v1.5"]:
+        print(model, embedding_store.compact(model))
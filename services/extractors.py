@@ -1,38 +1,43 @@
 from fastapi.responses import JSONResponse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import multiprocessing
 import json
-from io import BytesIO
+import os
 import re
+import shutil
+import tempfile
+import threading
 import pdfplumber
+from dotenv import load_dotenv
+from utils.text_cleaner import order_cleaner, act_cleaner
+from utils.chunker import split_fixed, split_sentences, pack_chunks, get_measure, CHUNK_OVERLAP
+
+load_dotenv()
+
+MAX_CHUNK_SIZE = int(os.getenv("CHUNK_MAX_SIZE", "2000"))
+METADATA_CHUNK_SIZE = int(os.getenv("CHUNK_METADATA_SIZE", "3000"))
 
 # <----- MAIN Function ----->
-def extractor(file, type: str, category: str):
+# `metadata`, when given, is filled with the document's country/state/court/year before
+# the first chunk is yielded.
+def extractor(file, type: str, category: str, metadata: dict | None = None):
     match category:
         case "order":
             if type=="pdf":
-                return order_extractor(file)
+                return order_extractor(file, metadata)
             elif type == "json":
-                return judgement_extractor(file)
+                return judgement_extractor(file, metadata)
         
         case "act":
-            return act_extractor(file)
+            return act_extractor(file, metadata)
 
         case _:
             raise JSONResponse(content="Unsupported file format!!!", status_code=400)
 
 # <----- ORDER EXTRACTOR ----->
 def clean_repeated_noise(text: str) -> str:
-    noise_patterns = [
-        r"Downloaded on\s*:\s*.*",
-        r"\bNEUTRAL\s+CITATION\b",
-        r"\bundefined\b",
-        r"CR\.MA\/\d+\/\d+\s+\d+\/\d+\s+JUDGMENT",
-    ]
-
-    for pattern in noise_patterns:
-        text = re.sub(pattern, "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\n=+\n", "\n", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
+    return order_cleaner.clean(text)
 
 
 def cleanup_order_text(text: str):
@@ -52,41 +57,82 @@ def cleanup_order_text(text: str):
 
     return metadata, main_content
 
-def order_extractor(file):
-    file_bytes = file.file.read()
-    with pdfplumber.open(BytesIO(file_bytes)) as pdf:
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text() or ""
+COURT_LINE_PATTERN = re.compile(r"^\s*(?:IN\s+THE\s+)?(.*?\bCOURT\b.*?)(?:\s+AT\s+.*)?\s*$", re.IGNORECASE | re.MULTILINE)
+COURT_STATE_PATTERN = re.compile(r"\bHIGH\s+COURT\s+OF\s+(?:JUDICATURE\s+(?:AT|FOR)\s+)?([A-Za-z ]+)|^([A-Za-z ]+?)\s+HIGH\s+COURT\b", re.IGNORECASE)
+ORDER_DATE_PATTERN = re.compile(r"Date\s*:\s*\d{2}/\d{2}/(\d{4})")
+
+def court_state(court: str) -> str:
+    state_match = COURT_STATE_PATTERN.search(court)
+    return (state_match.group(1) or state_match.group(2)).strip() if state_match else ""
+
+def order_metadata(header: str) -> dict:
+    court_match = COURT_LINE_PATTERN.search(header)
+    court = court_match.group(1).strip() if court_match else ""
+    state = court_state(court)
+    date_match = ORDER_DATE_PATTERN.search(header)
+    return {"country": "India", "state": state, "court": court, "year": date_match.group(1) if date_match else ""}
+
+# <----- PDF Pages ----->
+# Page text is extracted by a shared process pool, one page range per task, and handed
+# back in page order. Small PDFs are read in-process since the IPC would cost more.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+def extract_page_range(path: str, start: int, end: int) -> list[str]:
+    with pdfplumber.open(path) as pdf:
+        pages = []
+        for page in pdf.pages[start:end]:
+            pages.append(page.extract_text() or "")
+            # pdfplumber caches parsed objects per page; drop them as we go
+            page.close()
+        return pages
+
+def iter_pdf_pages(path: str):
+    with pdfplumber.open(path) as pdf:
+        page_count = len(pdf.pages)
+
+    if PDF_WORKERS <= 1 or page_count <= PDF_PAGES_PER_TASK:
+        yield from extract_page_range(path, 0, page_count)
+        return
+
+    starts = range(0, page_count, PDF_PAGES_PER_TASK)
+    ends = [min(start + PDF_PAGES_PER_TASK, page_count) for start in starts]
+    for pages in get_pdf_pool().map(extract_page_range, [path] * len(ends), starts, ends):
+        yield from pages
+
+# Uploads are read from disk rather than held in memory; files that are not spooled yet
+# (a plain UploadFile) are copied to a temp file first.
+@contextmanager
+def spooled_path(file, suffix: str = ""):
+    path = getattr(file, "path", None)
+    if path:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spool:
+        shutil.copyfileobj(file.file, spool, length=1024 * 1024)
+    try:
+        yield spool.name
+    finally:
+        os.remove(spool.name)
+
+def order_extractor(file, metadata: dict | None = None):
+    with spooled_path(file, suffix=".pdf") as path:
+        text = "".join(iter_pdf_pages(path))
     cleaned_text = cleanup_order_text(text)
-    max_chunk_size=2000
-    metadata_chunk_size=3000
-    sentences = re.split(r'(?<=[.!?]) +', cleaned_text[1]) 
-    chunks = []
-    temp_text = ""
-    for char in cleaned_text[0]:
-        if len(temp_text) + 1 > metadata_chunk_size:
-            chunks.append(temp_text.strip())
-            temp_text = char
-        else:
-            temp_text += char
-
-    if temp_text:
-        chunks.append(temp_text.strip())
-
-    temp_text=""
-    for sentence in sentences:
-        if len(temp_text) + len(sentence) > max_chunk_size:
-            if temp_text:  
-                chunks.append(temp_text.strip())
-            temp_text = sentence 
-        else:
-            temp_text += " " + sentence if temp_text else sentence
-
-    if temp_text:
-        chunks.append(temp_text.strip())
-
-    return chunks
+    if metadata is not None:
+        metadata.update(order_metadata(cleaned_text[0]))
+    yield from split_fixed(cleaned_text[0], METADATA_CHUNK_SIZE)
+    yield from pack_chunks(split_sentences(cleaned_text[1]), MAX_CHUNK_SIZE, measure=get_measure(), overlap=CHUNK_OVERLAP)
 
 # <----- JUDGEMENT EXTRACTOR ----->
 def get_judgement_metadata(content:dict):
@@ -174,84 +220,50 @@ Delivering Judge:{deliveringjudge},
 AppealType: {AppealType},
 Final Verdict: {FinalVerdict}"""
 
-def judgement_extractor(file):
-    file_bytes = file.file.read()
-    content = json.loads(file_bytes)
+def name_of(value) -> str:
+    return value.get("Name", "") if isinstance(value, dict) else value or ""
 
-    max_chunk_size = 2000
-    metadata_chunk_size=3000
-    output = []
-    temp_text = ""
-    metadata=get_judgement_metadata(content)
-    for char in metadata:
-        if len(temp_text) + 1 > metadata_chunk_size:
-            output.append(temp_text.strip())
-            temp_text = char
-        else:
-            temp_text += char
-
-    if temp_text:
-        output.append(temp_text.strip())
+def judgement_fields(content: dict) -> dict:
+    court = content.get("Court", {})
+    return {
+        "country": name_of(content.get("Country")),
+        "state": name_of(content.get("State")) or court_state(court.get("Name", "")),
+        "court": court.get("Name", ""),
+        "year": content.get("JudgmentDate", ""),
+    }
 
+def judgement_paragraphs(content: dict):
     data = content.get("JudgementText", {}).get("Paragraphs", [])
-    temp_text=""
     for para in data:
         subparagraphs = para.get("SubParagraphs", [])
-        for i, sub in enumerate(subparagraphs):
+        for sub in subparagraphs:
             text = sub.get("Text", "")
             # add indentation for subpoints
             if sub.get("IsSub"):
                 text = "\t" + text
+            yield text
 
-            if len(temp_text) + len(text) > max_chunk_size:
-                if temp_text:
-                    output.append(temp_text.strip())
-                temp_text = text
-            else:
-                temp_text += text
-
-    # flush leftover text
-    if temp_text:
-        output.append(temp_text.strip())
+def judgement_extractor(file, metadata: dict | None = None):
+    file_bytes = file.file.read()
+    content = json.loads(file_bytes)
+    if metadata is not None:
+        metadata.update(judgement_fields(content))
 
-    return output
+    metadata=get_judgement_metadata(content)
+    yield from split_fixed(metadata, METADATA_CHUNK_SIZE)
+    yield from pack_chunks(judgement_paragraphs(content), MAX_CHUNK_SIZE, joiner="", measure=get_measure(), overlap=CHUNK_OVERLAP)
 
 
 # <----- ACT EXTRACTOR ----->
 def cleanup_act_text(text: str):
-    text = re.sub("<Section>", "", text)
-    text = re.sub("</Section>", "", text)
-    text = re.sub("<SubSection>", "\n\t", text, count=100)
-    text = re.sub("</SubSection>", "", text, count=100)
-    text = re.sub("<FNR>", "", text, count=100)
-    text = re.sub("</FNR>", "", text, count=100)
-    text = re.sub("<FN>", "", text, count=100)
-    text = re.sub("</FN>", "", text, count=100)
-    text = re.sub("<FT>", "", text, count=100)
-    text = re.sub("</FT>", "", text, count=100)
-
-    return text
-
-def act_extractor(file):
+    return act_cleaner.clean(text)
+
+def act_extractor(file, metadata: dict | None = None):
     file_bytes=file.file
     data = json.load(file_bytes)
+    if metadata is not None:
+        metadata.update({"country": data.get("country", "India"), "state": data.get("state", ""), "court": "", "year": data.get("year", "")})
     # Main Content.
     text = data.get("text", "No content")
     splitted_text = cleanup_act_text(text)
-    max_chunk_size=2000
-    sentences = re.split(r'(?<=[.!?]) +', splitted_text) 
-    chunks = []
-    temp_text = ""
-
-    for sentence in sentences:
-        if len(temp_text) + len(sentence) > max_chunk_size:
-            if temp_text:  
-                chunks.append(temp_text.strip())
-            temp_text = sentence 
-        else:
-            temp_text += " " + sentence if temp_text else sentence
-
-    if temp_text:
-        chunks.append(temp_text.strip())
-
-    return chunks
+    yield from pack_chunks(split_sentences(splitted_text), MAX_CHUNK_SIZE, measure=get_measure(), overlap=CHUNK_OVERLAP)
\ No newline at end of file
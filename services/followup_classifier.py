@@ -0,0 +1,75 @@
+import os
+import re
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# <----- Followup Pre-Classifier ----->
+# Decides locally whether a query could possibly need the followup_handler rewrite.
+# Only clear cases are decided here; everything ambiguous still goes to the LLM.
+SKIP = "skip"
+ASK_LLM = "ask_llm"
+
+REFERENCE_MARKERS = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|he|she|him|her|his|same|above|aforesaid|"
+    r"said|such|former|latter|here|there|previous|earlier|mentioned)\b",
+    re.IGNORECASE,
+)
+FOLLOWUP_OPENERS = re.compile(
+    r"^\s*(and|also|but|so|then|what about|how about|what else|any other|more|elaborate|"
+    r"explain more|tell me more|continue|ok|okay|why|exceptions?)\b",
+    re.IGNORECASE,
+)
+ELLIPSIS = re.compile(r"(\.\.\.|…)\s*$")
+CITATION = re.compile(
+    r"\b((section|sec\.?|article|art\.|order|rule)\s*\d+|act|code|cpc|crpc|ipc|bns|bnss|constitution|"
+    r"v\.|vs\.?|versus|air|scc|high court|supreme court|\d{4})\b",
+    re.IGNORECASE,
+)
+
+MIN_WORDS = int(os.getenv("FOLLOWUP_MIN_WORDS", "5"))
+SELF_CONTAINED_WORDS = int(os.getenv("FOLLOWUP_SELF_CONTAINED_WORDS", "15"))
+ENABLED = os.getenv("FOLLOWUP_PRECLASSIFIER", "true").lower() == "true"
+
+stats = {"llm_calls_made": 0, "llm_calls_saved": 0, "reasons": {}}
+_lock = threading.Lock()
+
+def classify(query: str, history: list[dict]) -> tuple[str, str]:
+    if not ENABLED:
+        return ASK_LLM, "disabled"
+    if not history:
+        return SKIP, "no_history"
+    words = query.split()
+    if FOLLOWUP_OPENERS.search(query):
+        return ASK_LLM, "followup_opener"
+    if ELLIPSIS.search(query):
+        return ASK_LLM, "ellipsis"
+    if REFERENCE_MARKERS.search(query):
+        return ASK_LLM, "reference_marker"
+    if len(words) < MIN_WORDS:
+        return ASK_LLM, "short_query"
+    if CITATION.search(query):
+        return SKIP, "citation"
+    if len(words) >= SELF_CONTAINED_WORDS:
+        return SKIP, "long_query"
+    return ASK_LLM, "ambiguous"
+
+def record(decision: str, reason: str):
+    with _lock:
+        if decision == SKIP:
+            stats["llm_calls_saved"] += 1
+        else:
+            stats["llm_calls_made"] += 1
+        stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+
+def get_stats() -> dict:
+    with _lock:
+        total = stats["llm_calls_made"] + stats["llm_calls_saved"]
+        return {
+            "llm_calls_made": stats["llm_calls_made"],
+            "llm_calls_saved": stats["llm_calls_saved"],
+            "saved_ratio": round(stats["llm_calls_saved"] / total, 4) if total else 0.0,
+            "reasons": dict(stats["reasons"]),
+        }
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from services.milvus_services import ainsert
+from utils.observability import request_id_var
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# <----- Spooled Upload ----->
+# The request's UploadFile is closed as soon as /upload returns, so the job keeps its own
+# copy on disk. Extractors only need `.file` and `.filename`, same as UploadFile.
+class SpooledUpload:
+    def __init__(self, path: str, filename: str):
+        self.path = path
+        self.filename = filename
+        self.file = open(path, "rb")
+
+    def close(self):
+        self.file.close()
+        os.remove(self.path)
+
+# <----- Jobs ----->
+@dataclass
+class IngestionJob:
+    collection: str
+    file_name: str
+    file_type: str
+    upload: SpooledUpload
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    stage: str = "queued"
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+    chunks: int = 0
+    unchanged: int = 0
+    reused: int = 0
+    embedded: int = 0
+    inserted: int = 0
+    deleted: int = 0
+    stages: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    error: str | None = None
+    # The /upload request this job came from, so the worker's logs carry its id
+    request_id: str = field(default_factory=request_id_var.get)
+    _stage_started: float = field(default_factory=time.perf_counter)
+
+    # Called from the insert() thread whenever the pipeline moves on
+    def progress(self, stage: str, **counts):
+        now = time.perf_counter()
+        if stage != self.stage:
+            self.timings[self.stage] = round(self.timings.get(self.stage, 0) + now - self._stage_started, 3)
+            self.stage = stage
+            self._stage_started = now
+        for name, value in counts.items():
+            setattr(self, name, value)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "collection": self.collection,
+            "file_name": self.file_name,
+            "file_type": self.file_type,
+            "stage": self.stage,
+            "chunks": self.chunks,
+            "unchanged": self.unchanged,
+            "reused": self.reused,
+            "embedded": self.embedded,
+            "inserted": self.inserted,
+            "deleted": self.deleted,
+            "stages": self.stages,
+            "timings": self.timings,
+            "error": self.error,
+            "request_id": self.request_id,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+class QueueFull(Exception):
+    pass
+
+class IngestionQueue:
+    def __init__(self, maxsize: int = 16, workers: int = 2, history: int = 1000):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.history = history
+        self.jobs = OrderedDict()
+        self._queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def full(self) -> bool:
+        return self._queue is None or self._queue.full()
+
+    def submit(self, collection: str, file_name: str, file_type: str, upload: SpooledUpload) -> IngestionJob:
+        job = IngestionJob(collection=collection, file_name=file_name, file_type=file_type, upload=upload)
+        try:
+            self._queue.put_nowait(job)
+        except (asyncio.QueueFull, AttributeError):
+            raise QueueFull("Upload queue is full")
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            self.jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        return self.jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            request_token = request_id_var.set(job.request_id)
+            try:
+                job.progress("extracting")
+                response = await ainsert(collection=job.collection, file_name=job.file_name, file_type=job.file_type, file=job.upload, progress=job.progress)
+                if response:
+                    job.progress("done")
+                else:
+                    job.error = "There was an error inserting Data"
+                    job.progress("failed")
+            except Exception as e:
+                logger.exception("Ingestion job %s failed", job.id)
+                job.error = str(e)
+                job.progress("failed")
+            finally:
+                job.finished = time.time()
+                job.upload.close()
+                request_id_var.reset(request_token)
+                self._queue.task_done()
+
+ingestion_queue = IngestionQueue(
+    maxsize=int(os.getenv("INGESTION_QUEUE_SIZE", "16")),
+    workers=int(os.getenv("INGESTION_WORKERS", "2")),
+    history=int(os.getenv("INGESTION_JOB_HISTORY", "1000")),
+)
@@ -1,15 +1,22 @@
 from services.prompts import Prompt
-from utils.llms import get_llm
+from utils.llm_scheduler import llm_scheduler
 
-# Local
-def llm(query: str, chat_history: list[dict], context: str = "No Context Found Do not response") -> tuple[str, str]:
+def build_messages(query: str, chat_history: list[dict], context: str) -> list[dict]:
     prompt = Prompt.response_prompt(context=context)
     promptm={"role":"user","content":prompt}
     chat_history.append(promptm)
     querym={"role":"user","content":query}
     chat_history.append(querym)
-    messages = chat_history
-    generation = get_llm().invoke(messages)
+    return chat_history
+
+async def allm(query: str, chat_history: list[dict], context: str = "No Context Found Do not response") -> tuple[str, str]:
+    messages = build_messages(query=query, chat_history=chat_history, context=context)
+    generation = await llm_scheduler.ainvoke(messages, priority="chat")
     response = generation.content
     tokens=generation.usage_metadata["total_tokens"]
-    return response,tokens
\ No newline at end of file
+    return response,tokens
+
+async def astream_llm(query: str, chat_history: list[dict], context: str = "No Context Found Do not response"):
+    messages = build_messages(query=query, chat_history=chat_history, context=context)
+    async for chunk in llm_scheduler.astream(messages, priority="chat"):
+        yield chunk
\ No newline at end of file
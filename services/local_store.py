@@ -0,0 +1,197 @@
+from collections import Counter
+import math
+import re
+import threading
+
+import numpy as np
+
+from services.vector_store import VectorStore, METADATA_FIELDS, filter_matches, rrf_fuse
+from services.search_profiles import IndexProfile, SearchProfile, get_search_profile
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+# <----- Local Collection ----->
+# Rows live in a growable float32 matrix of unit vectors, so dense search is one
+# matrix-vector product. `text` is kept in a BM25 inverted index (term -> {row: tf}).
+# Deleted rows are masked out and their postings removed; upsert appends a fresh row.
+class LocalCollection:
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.size = 0
+        self.ids = []
+        self.texts = []
+        self.hashes = []
+        self.metadata = []
+        self.term_counts = []
+        self.rows_by_id = {}
+        self.postings = {}
+        self.total_length = 0
+
+    def _grow(self):
+        capacity = max(16, len(self.matrix) * 2)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        self.matrix = matrix
+        self.alive = np.concatenate([self.alive, np.zeros(capacity - len(self.alive), dtype=bool)])
+        self.doc_lengths = np.concatenate([self.doc_lengths, np.zeros(capacity - len(self.doc_lengths), dtype=np.float32)])
+
+    def add(self, row: dict):
+        self.remove(row["id"])
+        if self.size == len(self.matrix):
+            self._grow()
+        index = self.size
+        vector = np.asarray(row["vector"], dtype=np.float32)
+        self.matrix[index] = vector / (np.linalg.norm(vector) or 1.0)
+        self.alive[index] = True
+        terms = Counter(tokenize(row["text"]))
+        self.doc_lengths[index] = sum(terms.values())
+        self.total_length += sum(terms.values())
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[index] = count
+        self.ids.append(row["id"])
+        self.texts.append(row["text"])
+        self.hashes.append(row.get("chunk_hash"))
+        self.metadata.append({field: row.get(field) for field in METADATA_FIELDS})
+        self.term_counts.append(terms)
+        self.rows_by_id[row["id"]] = index
+        self.size += 1
+
+    def remove(self, row_id: str) -> bool:
+        index = self.rows_by_id.pop(row_id, None)
+        if index is None:
+            return False
+        self.alive[index] = False
+        self.total_length -= int(self.doc_lengths[index])
+        for term in self.term_counts[index]:
+            postings = self.postings[term]
+            del postings[index]
+            if not postings:
+                del self.postings[term]
+        self.term_counts[index] = Counter()
+        return True
+
+    def filter_mask(self, filters: dict | None) -> np.ndarray:
+        mask = self.alive[:self.size].copy()
+        if filters:
+            for index in np.flatnonzero(mask):
+                mask[index] = filter_matches(self.metadata[index], filters)
+        return mask
+
+    def dense_top_k(self, vector: list[float], k: int, mask: np.ndarray | None = None) -> list[int]:
+        mask = self.alive[:self.size] if mask is None else mask
+        k = min(k, int(mask.sum()))
+        if not k:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self.matrix[:self.size] @ query
+        scores[~mask] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+    def bm25_top_k(self, query: str, k: int, k1: float = 1.2, b: float = 0.75, mask: np.ndarray | None = None) -> list[int]:
+        documents = len(self.rows_by_id)
+        if not documents:
+            return []
+        average_length = self.total_length / documents or 1.0
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            rows = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            counts = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            norms = k1 * (1 - b + b * self.doc_lengths[rows] / average_length)
+            scores[rows] += idf * counts * (k1 + 1) / (counts + norms)
+        if mask is not None:
+            scores[~mask] = 0
+        matched = np.flatnonzero(scores > 0)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return top.tolist()
+
+# <----- In-Process Store ----->
+# A network-free VectorStore for small collections, offline runs, tests and benchmarks.
+# Same request shape as the Milvus hybrid search: dense top-k and BM25 top-k fused with RRF,
+# sized by the collection's search profile. Search is exact, so ef and the index profile
+# do not apply; that also makes it the brute-force baseline for benchmarks.search_tuning.
+class LocalStore(VectorStore):
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+        self.collections = {}
+        self._lock = threading.RLock()
+
+    def has_collection(self, collection: str) -> bool:
+        return collection in self.collections
+
+    def create_collection(self, collection: str, index_profile: IndexProfile | None = None) -> dict:
+        with self._lock:
+            self.collections.setdefault(collection, LocalCollection(self.dim))
+        return {"status": 200, "message": "created"}
+
+    def list_collections(self) -> list[str]:
+        return list(self.collections)
+
+    def drop_collection(self, collection: str):
+        with self._lock:
+            self.collections.pop(collection, None)
+
+    def fields(self, collection: str) -> set[str]:
+        return {"id", "vector", "text", "sparse", "chunk_hash", *METADATA_FIELDS}
+
+    def upsert(self, collection: str, rows: list[dict]) -> int:
+        with self._lock:
+            store = self.collections.setdefault(collection, LocalCollection(self.dim))
+            for row in rows:
+                store.add(row)
+        return len(rows)
+
+    def delete(self, collection: str, ids: list[str]) -> int:
+        with self._lock:
+            store = self.collections.get(collection)
+            return sum(store.remove(row_id) for row_id in ids) if store else 0
+
+    def hashes_with_prefix(self, collection: str, prefix: str, with_hash: bool = True) -> dict[str, str | None]:
+        with self._lock:
+            store = self.collections.get(collection)
+            if store is None:
+                return {}
+            return {row_id: store.hashes[index] for row_id, index in store.rows_by_id.items() if row_id.startswith(prefix)}
+
+    def iter_rows(self, collection: str, batch_size: int = 1000):
+        with self._lock:
+            store = self.collections.get(collection)
+            rows = [] if store is None else [
+                {"id": store.ids[index], "text": store.texts[index], "vector": store.matrix[index].tolist(), "chunk_hash": store.hashes[index], **store.metadata[index]}
+                for index in store.rows_by_id.values()
+            ]
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    def vectors_by_hash(self, collection: str, hashes: list[str]) -> dict[str, list[float]]:
+        wanted = set(hashes)
+        with self._lock:
+            store = self.collections.get(collection)
+            if store is None:
+                return {}
+            return {store.hashes[index]: store.matrix[index].tolist() for index in store.rows_by_id.values() if store.hashes[index] in wanted}
+
+    def hybrid_search(self, collection: str, query: str, vector: list[float], limit: int | None = None, filters: dict | None = None, profile: SearchProfile | None = None) -> list[dict]:
+        profile = profile or get_search_profile(collection)
+        with self._lock:
+            store = self.collections.get(collection)
+            if store is None:
+                raise ValueError(f"collection not found[collection={collection}]")
+            mask = store.filter_mask(filters)
+            dense = store.dense_top_k(vector, profile.dense_limit, mask=mask)
+            sparse = store.bm25_top_k(query, profile.sparse_limit, mask=mask)
+            fused = rrf_fuse([dense, sparse], k=profile.rrf_k, limit=limit or profile.limit)
+            return [{"id": store.ids[index], "text": store.texts[index], "distance": score} for index, score in fused]
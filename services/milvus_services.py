@@ -1,143 +1,296 @@
-from pymilvus import MilvusClient, CollectionSchema, FieldSchema, DataType,AnnSearchRequest,Function,FunctionType,RRFRanker
 from services.extractors import extractor
-from services.embedder import generate_embeddings, search_embeddings
-from utils.chunker import  create_ids
+from services.embedder import generate_embeddings, asearch_embeddings, stored_embeddings, remember_embeddings
+from services.answer_cache import answer_cache
+from services.context_builder import pack_context
+from services.vector_store import get_vector_store, normalize_metadata, normalize_text, rrf_fuse, METADATA_FIELDS
+from utils.chunker import  chunk_id, chunk_fingerprint
+from utils.pipeline import run_pipeline, batched
+from utils.observability import span
+from utils.singleflight import SingleFlight, flight_key
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+import asyncio
+import logging
+import statistics
+import threading
 import time
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-bm25_function = Function(
-    name="text_bm25_emb",
-    input_field_names=["text"], 
-    output_field_names=["sparse"],
-    function_type=FunctionType.BM25, 
-)
-schema = CollectionSchema(
-    fields=[
-        FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, auto_id=False, max_length=50),
-        FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=768, metric_type="COSINE"),
-        FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535, enable_analyzer=True),
-        FieldSchema(name="sparse", dtype=DataType.SPARSE_FLOAT_VECTOR,metric_type="COSINE")
-    ],
-    description="Collection for storing text embeddings",
-)
-schema.add_function(bm25_function)
-
-milvus_client = MilvusClient(uri=os.getenv("ZILLIS_URI_ENDPOINT"), token=os.getenv("ZILLIS_TOKEN"), password=os.getenv("ZILLIS_PASSWORD"), db_name=os.getenv("ZILLIS_DB_NAME"))
-# milvus_client = MilvusClient(uri=os.getenv("MILVUS_URI"), db_name=os.getenv("MILVUS_DB_NAME"))
-                
-def create_collection(collection: str) -> dict:
-    index_params = milvus_client.prepare_index_params()
-
-    index_params.add_index(
-        field_name="vector", 
-        index_type="HNSW",
-        metric_type="COSINE",
-        efConstruction=256,
-        M=64
-    )
-    index_params.add_index(
-        field_name="sparse",
-        index_type="SPARSE_INVERTED_INDEX",
-        metric_type="BM25",
-        params={
-            "inverted_index_algo": "DAAT_MAXSCORE",
-            "bm25_k1": 1.2, #controls frequency saturation
-            "bm25_b": 0.75 #controls document length nomalization
-        }
-    )
+logger = logging.getLogger(__name__)
 
-    try:
-        milvus_client.create_collection(
-            collection_name=collection,
-            schema=schema,
-            index_params=index_params,
-        )
-        return {"status": 200, "message": "created"}
-    except Exception as e:
-        return {"status": 400, "message": str(e)}
+# Milvus by default; VECTOR_STORE=local runs everything in-process (see services/local_store.py).
+# The backend (and its client connection) is created on first use, not at import.
+_vector_store = None
+_vector_store_lock = threading.Lock()
 
-def insert(collection: str, file_name: str,  file_type: str, file) -> dict | None:
-    chunks = extractor(file=file, type=file_type, category=collection)
-    print("length of chunks:", len(chunks))
-    current_time = time.time()
-    embeddings = generate_embeddings(chunks)
-    embedding_time = time.time()
-    print("Time taken:", embedding_time - current_time)
-    print("length of embeddings:", len(embeddings))
+def get_store():
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            _vector_store = get_vector_store()
+        return _vector_store
+
+# Store calls are blocking, so async callers hand them to a bounded pool instead of the event loop.
+# The caller's context goes along, so logs from the pool keep the request id.
+store_executor = ThreadPoolExecutor(max_workers=int(os.getenv("STORE_MAX_WORKERS", os.getenv("MILVUS_MAX_WORKERS", "8"))), thread_name_prefix="store")
+
+async def run_in_store_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(store_executor, partial(copy_context().run, func, *args, **kwargs))
+
+def no_progress(stage: str, **counts):
+    pass
+
+# <----- Ingestion Pipeline ----->
+# extract -> embed -> insert run as overlapping stages over bounded queues, so embedding
+# batches are in flight while earlier batches are being written to the vector store.
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "2"))
+INGEST_INSERT_WORKERS = int(os.getenv("INGEST_INSERT_WORKERS", "1"))
 
+# <----- Incremental Ingestion ----->
+# Chunk ids are derived from a hash of the normalized chunk text, so re-uploading a file
+# only embeds and writes the chunks whose text changed, reuses vectors already stored
+# for the same text, and deletes the chunks the new version no longer has.
+# Collections created before `chunk_hash` existed are simply re-ingested in full.
+def insert(collection: str, file_name: str,  file_type: str, file, progress=no_progress) -> dict | None:
     # Check if Collection Exist
-    collection_exist = milvus_client.has_collection(collection_name=collection)
+    collection_exist = get_store().has_collection(collection)
     if not collection_exist:
-        collection_response = create_collection(collection=collection)
+        collection_response = get_store().create_collection(collection)
 
-        # Collection Created Successfully?
+        # Collection Created Successfully? The ingestion job reports the message as failed
         if collection_response["status"] != 200:
-            return collection_response["message"]
+            raise RuntimeError(f"Could not create collection {collection}: {collection_response['message']}")
 
-    chunk_ids = create_ids(name=file_name, length=len(chunks))
-    data_to_insert = [{"id": chunk_id, "vector": embedding, "text": chunk} for embedding, chunk, chunk_id in zip(embeddings, chunks, chunk_ids)]
-    response = milvus_client.insert(
-        collection_name=collection,
-        data=data_to_insert,
+    fields = get_store().fields(collection)
+    has_hash = "chunk_hash" in fields
+    # Collections created before the metadata fields existed keep storing text only
+    has_metadata = set(METADATA_FIELDS) <= fields
+    existing = get_store().hashes_with_prefix(collection, prefix=chunk_id(name=file_name, key=""), with_hash=has_hash)
+    seen = set()
+    counts = {"chunks": 0, "unchanged": 0, "reused": 0, "embedded": 0, "inserted": 0, "deleted": 0}
+    counts_lock = threading.Lock()
+
+    def rows():
+        metadata = {}
+        chunks = extractor(file=file, type=file_type, category=collection, metadata=metadata)
+        fields = None
+        for chunk in chunks:
+            if fields is None:
+                fields = normalize_metadata(metadata) if has_metadata else {}
+            counts["chunks"] += 1
+            fingerprint = chunk_fingerprint(chunk)
+            row_id = chunk_id(name=file_name, key=fingerprint[:16])
+            if row_id in seen:
+                continue
+            seen.add(row_id)
+            if has_hash and existing.get(row_id) == fingerprint:
+                counts["unchanged"] += 1
+                continue
+            yield {"id": row_id, "text": chunk, "chunk_hash": fingerprint, **fields}
+
+    # Vectors come from the local embedding store, then from rows of this collection
+    # with the same text, and only then from Nomic
+    def embed_batch(batch: list[dict]) -> list[dict]:
+        stored = stored_embeddings([row["chunk_hash"] for row in batch])
+        unknown = [row["chunk_hash"] for row in batch if row["chunk_hash"] not in stored]
+        if has_hash and unknown:
+            from_collection = get_store().vectors_by_hash(collection, unknown)
+            remember_embeddings(from_collection)
+            stored.update(from_collection)
+        missing = [row for row in batch if row["chunk_hash"] not in stored]
+        embeddings = generate_embeddings([row["text"] for row in missing], hashes=[row["chunk_hash"] for row in missing], lookup=False) if missing else []
+        for row, embedding in zip(missing, embeddings):
+            row["vector"] = embedding
+        for row in batch:
+            if "vector" not in row:
+                row["vector"] = stored[row["chunk_hash"]]
+            if not has_hash:
+                del row["chunk_hash"]
+        with counts_lock:
+            counts["embedded"] += len(missing)
+            counts["reused"] += len(batch) - len(missing)
+            progress("ingesting", chunks=counts["chunks"], unchanged=counts["unchanged"], embedded=counts["embedded"], reused=counts["reused"])
+        return batch
+
+    def insert_batch(batch: list[dict]) -> list[dict]:
+        upserted = get_store().upsert(collection, batch)
+        with counts_lock:
+            counts["inserted"] += upserted
+            progress("ingesting", inserted=counts["inserted"])
+        return batch
+
+    current_time = time.time()
+    stats = run_pipeline(
+        batched(rows(), INGEST_BATCH_SIZE),
+        stages=[("embed", embed_batch, INGEST_EMBED_WORKERS), ("insert", insert_batch, INGEST_INSERT_WORKERS)],
+        queue_size=INGEST_QUEUE_SIZE,
     )
-    print("Inserted Data")
-    print("Response from Milvus:", response)
-    return response if response else None
 
-def search(query: str,collection:str) -> str:
-    search_query = search_embeddings(query=query)
+    # Chunks of the previous version of this file that the new version no longer has
+    stale = [row_id for row_id in existing if row_id not in seen]
+    for start in range(0, len(stale), INGEST_BATCH_SIZE):
+        get_store().delete(collection, stale[start:start + INGEST_BATCH_SIZE])
+    counts["deleted"] = len(stale)
 
-    context=""
+    if counts["inserted"] or counts["deleted"]:
+        answer_cache.invalidate(collection)
+        answer_cache.invalidate(FANOUT_INTENT)
+    stages = {name: stage.to_dict() for name, stage in stats.items()}
+    progress("ingesting", **counts, stages=stages)
+    logger.info("Ingested %s/%s in %.2fs: %s", collection, file_name, time.time() - current_time, counts)
+    logger.debug("Ingestion stages: %s", stages)
+    response = {**counts, "stages": stages}
+    return response if counts["chunks"] else None
 
-    search_param_1 = {
-        "data": [search_query],
-        "anns_field": "vector",
-        "param": {"efSearch": 512},
-        "limit": 2
-    }
-    request_1 = AnnSearchRequest(**search_param_1)
+async def ainsert(collection: str, file_name: str,  file_type: str, file, progress=no_progress) -> dict | None:
+    with span("ingest", collection=collection) as attrs:
+        response = await run_in_store_executor(insert, collection=collection, file_name=file_name, file_type=file_type, file=file, progress=progress)
+        attrs["chunks"] = response["chunks"] if isinstance(response, dict) else 0
+        return response
 
-    search_param_2 = {
-        "data": [query],
-        "anns_field": "sparse",
-        "param": {"drop_ratio_search": 0.0},
-        "limit": 2
-    }
-    request_2 = AnnSearchRequest(**search_param_2)
-    
-    req=[request_1,request_2]
-    ranker = RRFRanker(100)
-
-    documents = milvus_client.hybrid_search(
-    collection_name=collection,
-    reqs=req,
-    ranker=ranker,
-    limit=5,
-    output_fields=["text","id"]
-)
-    
+# Hits are deduplicated and packed into the context token budget (see context_builder);
+# returns (context, document ids, usage, chunk ids) or None when nothing was retrieved.
+# The chunk ids (with their collection after a fan-out) key the answer cache.
+def build_context(documents: list[dict]):
+    with span("context", hits=len(documents)) as attrs:
+        packed, usage = pack_context(documents)
+        attrs.update(packed=len(packed), context_tokens=usage["context_tokens"])
+    context=""
     document_id=[]
-    if documents:
-        for document in documents:
-            for doc in document:
-                data=doc.get("entity",doc)
-                document_id.append(data.get('id').split("_@_")[0])            
-                print(f"Id: {data.get('id')}\nDistance: {doc.get('distance')}\nContent: {data.get('text')}\n")
-                context+= f"\nContext: {data.get('text')}\n"
+    chunk_ids=[]
+    for doc in packed:
+        document_id.append(doc.get('id').split("_@_")[0])
+        chunk_ids.append(f"{doc['collection']}/{doc.get('id')}" if doc.get('collection') else doc.get('id'))
+        logger.debug("Hit %s distance=%s chars=%d", doc.get('id'), doc.get('distance'), len(doc.get('text') or ""))
+        context+= f"\nContext: {doc.get('text')}\n"
     document_id=set(document_id)
     document_id=list(document_id)
     if context:
-        return context,document_id 
+        return context,document_id,usage,chunk_ids
     else:
-        print("No Context Passed")
+        logger.info("No context retrieved")
         return None
 
+# Identical searches in flight at the same time (same normalized query, collections and
+# filters) run once and all get the same context. `filters` are parsed filters (see
+# parse_filters), applied to both the dense and BM25 side.
+search_flight = SingleFlight("search")
+
+async def asearch(query: str,collection:str, filters: dict | None = None) -> str:
+    async def run():
+        with span("embed"):
+            search_query = await asearch_embeddings(query=query)
+        with span("search", collection=collection) as attrs:
+            documents = await run_in_store_executor(lambda: get_store().hybrid_search(collection, query=query, vector=search_query, filters=filters))
+            attrs["hits"] = len(documents)
+        return build_context(documents)
+
+    return await search_flight.do(flight_key("search", collection, normalize_text(query), filters), run)
+
+# <----- Fan-out Search ----->
+# With no intent (or "all"/"mixed", or a list of collections) the query is searched in
+# every collection at once, one store call per collection on the store pool, so the wait
+# is the slowest collection rather than the sum. Hits are fused across collections with
+# RRF on their per-collection rank and capped by count and by total characters.
+FANOUT_INTENT = "all"
+FANOUT_COLLECTIONS = [name.strip() for name in os.getenv("FANOUT_COLLECTIONS", "act,order").split(",") if name.strip()]
+FANOUT_RRF_K = int(os.getenv("FANOUT_RRF_K", "100"))
+FANOUT_MAX_HITS = int(os.getenv("FANOUT_MAX_HITS", "6"))
+FANOUT_MAX_CONTEXT_CHARS = int(os.getenv("FANOUT_MAX_CONTEXT_CHARS", "12000"))
+
+fanout_latency = {}
+fanout_stats = {"searches": 0, "failures": 0, "wall_ms": deque(maxlen=1000), "sum_ms": deque(maxlen=1000)}
+# search_collection runs on the store executor threads, so every counter update goes through this
+fanout_stats_lock = threading.Lock()
+
+def fanout_collections(intent) -> list[str] | None:
+    if isinstance(intent, list):
+        return [collection for collection in intent if collection] or FANOUT_COLLECTIONS
+    if not intent or intent in (FANOUT_INTENT, "mixed"):
+        return FANOUT_COLLECTIONS
+    return None
+
+def _summary(samples) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+def get_fanout_stats() -> dict:
+    with fanout_stats_lock:
+        searches, failures = fanout_stats["searches"], fanout_stats["failures"]
+        wall, sums = list(fanout_stats["wall_ms"]), list(fanout_stats["sum_ms"])
+        latency = {collection: list(samples) for collection, samples in fanout_latency.items()}
+    return {
+        "searches": searches,
+        "failures": failures,
+        "wall": _summary(wall),
+        "sum_of_collections": _summary(sums),
+        "collections": {collection: _summary(samples) for collection, samples in latency.items()},
+    }
+
+def search_collection(collection: str, query: str, vector: list[float], filters: dict | None = None) -> tuple[list[dict], float]:
+    start = time.perf_counter()
+    try:
+        return get_store().hybrid_search(collection, query=query, vector=vector, filters=filters), (time.perf_counter() - start) * 1000
+    except Exception as e:
+        # A missing or failing collection should not cost the others their context
+        logger.warning("Fan-out search failed for %s: %s", collection, e)
+        with fanout_stats_lock:
+            fanout_stats["failures"] += 1
+        return [], (time.perf_counter() - start) * 1000
+
+def fuse_hits(results: dict[str, list[dict]]) -> list[dict]:
+    hits = {(collection, hit["id"]): hit for collection, documents in results.items() for hit in documents}
+    rankings = [[(collection, hit["id"]) for hit in documents] for collection, documents in results.items()]
+    fused = []
+    size = 0
+    for key, score in rrf_fuse(rankings, k=FANOUT_RRF_K, limit=FANOUT_MAX_HITS):
+        text = hits[key]["text"] or ""
+        if fused and size + len(text) > FANOUT_MAX_CONTEXT_CHARS:
+            break
+        size += len(text)
+        fused.append({**hits[key], "distance": score, "collection": key[0]})
+    return fused
+
+async def afanout_search(query: str, collections: list[str], filters: dict | None = None) -> str:
+    return await search_flight.do(flight_key("fanout", collections, normalize_text(query), filters), lambda: _fanout_search(query, collections, filters))
+
+async def _fanout_search(query: str, collections: list[str], filters: dict | None = None) -> str:
+    with span("embed"):
+        search_query = await asearch_embeddings(query=query)
+    start = time.perf_counter()
+    with span("search", collection=FANOUT_INTENT) as attrs:
+        timed = await asyncio.gather(*(run_in_store_executor(search_collection, collection, query, search_query, filters) for collection in collections))
+        attrs["hits"] = sum(len(documents) for documents, _ in timed)
+    wall = (time.perf_counter() - start) * 1000
+    with fanout_stats_lock:
+        fanout_stats["searches"] += 1
+        fanout_stats["wall_ms"].append(wall)
+        fanout_stats["sum_ms"].append(sum(elapsed for _, elapsed in timed))
+        for collection, (_, elapsed) in zip(collections, timed):
+            fanout_latency.setdefault(collection, deque(maxlen=1000)).append(elapsed)
+    logger.debug("Fan-out latency (ms): %s wall: %.2f", {collection: round(elapsed, 2) for collection, (_, elapsed) in zip(collections, timed)}, wall)
+    return build_context(fuse_hits({collection: documents for collection, (documents, _) in zip(collections, timed)}))
+
 def delete_colletion():
-    collections= milvus_client.list_collections()
+    collections= get_store().list_collections()
     for collection in collections:
-        milvus_client.drop_collection(collection)
-        print(f"Dropped {collection}")
+        get_store().drop_collection(collection)
+        answer_cache.invalidate(collection)
+        logger.info("Dropped %s", collection)
+    answer_cache.invalidate(FANOUT_INTENT)
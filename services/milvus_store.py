@@ -0,0 +1,206 @@
+from pymilvus import MilvusClient, CollectionSchema, FieldSchema, DataType,AnnSearchRequest,Function,FunctionType,RRFRanker
+from services.vector_store import VectorStore, TEXT_FIELDS, METADATA_FIELDS
+from services.search_profiles import IndexProfile, SearchProfile, get_index_profile, get_search_profile
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Chunks are spread over partitions by court (or year), so a search filtered on the
+# partition key only touches the matching partitions.
+PARTITION_KEY = os.getenv("MILVUS_PARTITION_KEY", "court")
+NUM_PARTITIONS = int(os.getenv("MILVUS_NUM_PARTITIONS", "64"))
+
+# Built when a collection is created rather than at import
+def build_schema() -> CollectionSchema:
+    bm25_function = Function(
+        name="text_bm25_emb",
+        input_field_names=["text"], 
+        output_field_names=["sparse"],
+        function_type=FunctionType.BM25, 
+    )
+    schema = CollectionSchema(
+        fields=[
+            FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, auto_id=False, max_length=256),
+            FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=768, metric_type="COSINE"),
+            FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535, enable_analyzer=True),
+            FieldSchema(name="sparse", dtype=DataType.SPARSE_FLOAT_VECTOR,metric_type="COSINE"),
+            FieldSchema(name="chunk_hash", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="country", dtype=DataType.VARCHAR, max_length=256, is_partition_key=PARTITION_KEY == "country"),
+            FieldSchema(name="state", dtype=DataType.VARCHAR, max_length=256, is_partition_key=PARTITION_KEY == "state"),
+            FieldSchema(name="court", dtype=DataType.VARCHAR, max_length=256, is_partition_key=PARTITION_KEY == "court"),
+            FieldSchema(name="year", dtype=DataType.INT64, is_partition_key=PARTITION_KEY == "year"),
+        ],
+        description="Collection for storing text embeddings",
+    )
+    schema.add_function(bm25_function)
+    return schema
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("%", "\\%").replace("_", "\\_")
+
+def quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+OPERATORS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Parsed filters (see parse_filters) to a boolean expression; equality and `in` on the
+# partition key let Milvus prune partitions.
+def compile_filter(filters: dict | None) -> str:
+    clauses = []
+    for field, condition in (filters or {}).items():
+        literal = quote if field in TEXT_FIELDS else str
+        if "in" in condition:
+            values = condition["in"]
+            if len(values) == 1:
+                clauses.append(f"{field} == {literal(values[0])}")
+            else:
+                clauses.append(f"{field} in [{', '.join(literal(value) for value in values)}]")
+        for operator, symbol in OPERATORS.items():
+            if operator in condition:
+                clauses.append(f"{field} {symbol} {int(condition[operator])}")
+    return " and ".join(clauses)
+
+# <----- Milvus / Zilliz ----->
+class MilvusStore(VectorStore):
+    def __init__(self):
+        self.client = MilvusClient(uri=os.getenv("ZILLIS_URI_ENDPOINT"), token=os.getenv("ZILLIS_TOKEN"), password=os.getenv("ZILLIS_PASSWORD"), db_name=os.getenv("ZILLIS_DB_NAME"))
+        # self.client = MilvusClient(uri=os.getenv("MILVUS_URI"), db_name=os.getenv("MILVUS_DB_NAME"))
+
+    def has_collection(self, collection: str) -> bool:
+        return self.client.has_collection(collection_name=collection)
+
+    def create_collection(self, collection: str, index_profile: IndexProfile | None = None) -> dict:
+        index_profile = index_profile or get_index_profile(collection)
+        index_params = self.client.prepare_index_params()
+
+        index_params.add_index(
+            field_name="vector", 
+            index_type="HNSW",
+            metric_type="COSINE",
+            efConstruction=index_profile.ef_construction,
+            M=index_profile.M
+        )
+        index_params.add_index(
+            field_name="sparse",
+            index_type="SPARSE_INVERTED_INDEX",
+            metric_type="BM25",
+            params={
+                "inverted_index_algo": "DAAT_MAXSCORE",
+                "bm25_k1": 1.2, #controls frequency saturation
+                "bm25_b": 0.75 #controls document length nomalization
+            }
+        )
+        for field in TEXT_FIELDS:
+            index_params.add_index(field_name=field, index_type="INVERTED")
+        index_params.add_index(field_name="year", index_type="STL_SORT")
+        index_params.add_index(field_name="chunk_hash", index_type="INVERTED")
+
+        try:
+            self.client.create_collection(
+                collection_name=collection,
+                schema=build_schema(),
+                index_params=index_params,
+                num_partitions=NUM_PARTITIONS,
+            )
+            return {"status": 200, "message": "created"}
+        except Exception as e:
+            return {"status": 400, "message": str(e)}
+
+    def load_collection(self, collection: str):
+        self.client.load_collection(collection_name=collection)
+
+    def list_collections(self) -> list[str]:
+        return self.client.list_collections()
+
+    def drop_collection(self, collection: str):
+        self.client.drop_collection(collection)
+
+    def fields(self, collection: str) -> set[str]:
+        description = self.client.describe_collection(collection_name=collection)
+        return {field["name"] for field in description["fields"]}
+
+    def upsert(self, collection: str, rows: list[dict]) -> int:
+        response = self.client.upsert(collection_name=collection, data=rows)
+        return response["upsert_count"] if response else 0
+
+    def delete(self, collection: str, ids: list[str]) -> int:
+        response = self.client.delete(collection_name=collection, ids=ids)
+        return response["delete_count"] if response else 0
+
+    def hashes_with_prefix(self, collection: str, prefix: str, with_hash: bool = True) -> dict[str, str | None]:
+        iterator = self.client.query_iterator(
+            collection_name=collection,
+            filter=f'id like "{escape_like(prefix)}%"',
+            output_fields=["id", "chunk_hash"] if with_hash else ["id"],
+            batch_size=1000,
+        )
+        existing = {}
+        try:
+            while rows := iterator.next():
+                for row in rows:
+                    existing[row["id"]] = row.get("chunk_hash")
+        finally:
+            iterator.close()
+        return existing
+
+    def iter_rows(self, collection: str, batch_size: int = 1000):
+        iterator = self.client.query_iterator(
+            collection_name=collection,
+            filter="",
+            output_fields=[field for field in ("id", "text", "vector", "chunk_hash", *METADATA_FIELDS) if field in self.fields(collection)],
+            batch_size=batch_size,
+        )
+        try:
+            while rows := iterator.next():
+                yield rows
+        finally:
+            iterator.close()
+
+    def vectors_by_hash(self, collection: str, hashes: list[str]) -> dict[str, list[float]]:
+        rows = self.client.query(
+            collection_name=collection,
+            filter=f"chunk_hash in [{', '.join(quote(h) for h in hashes)}]",
+            output_fields=["chunk_hash", "vector"],
+        )
+        return {row["chunk_hash"]: row["vector"] for row in rows}
+
+    def hybrid_search(self, collection: str, query: str, vector: list[float], limit: int | None = None, filters: dict | None = None, profile: SearchProfile | None = None) -> list[dict]:
+        profile = profile or get_search_profile(collection)
+        expr = compile_filter(filters) or None
+        search_param_1 = {
+            "data": [vector],
+            "anns_field": "vector",
+            # HNSW needs ef >= the number of results asked for
+            "param": {"ef": max(profile.ef, profile.dense_limit)},
+            "limit": profile.dense_limit,
+            "expr": expr,
+        }
+        request_1 = AnnSearchRequest(**search_param_1)
+
+        search_param_2 = {
+            "data": [query],
+            "anns_field": "sparse",
+            "param": {"drop_ratio_search": profile.drop_ratio},
+            "limit": profile.sparse_limit,
+            "expr": expr,
+        }
+        request_2 = AnnSearchRequest(**search_param_2)
+        
+        req=[request_1,request_2]
+        ranker = RRFRanker(profile.rrf_k)
+
+        documents = self.client.hybrid_search(
+            collection_name=collection,
+            reqs=req,
+            ranker=ranker,
+            limit=limit or profile.limit,
+            output_fields=["text","id"]
+        )
+        hits = []
+        for document in documents or []:
+            for doc in document:
+                data=doc.get("entity",doc)
+                hits.append({"id": data.get("id"), "text": data.get("text"), "distance": doc.get("distance")})
+        return hits
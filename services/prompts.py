@@ -1,4 +1,25 @@
 class Prompt():
+    def followup_prompt(query: str):
+        return f"""You are a Legal AI assistant.  
+        You have access to 1 tool: `followup_handler`.  
+
+        You MUST CALL `followup_handler` if:  
+        1. The user's message is a follow-up to a previous conversation.  
+        2. The user's message is unclear, ambiguous, or lacks sufficient context to provide a confident answer.  
+
+        Examples:  
+        - User: "What does the Indian Contract Act, 1872 say about minors entering contracts?"  
+        Assistant: "It states that contracts with minors are void from the beginning."  
+        User: "What about exceptions?"  
+        Tool: `followup_handler`  
+
+        - User: "Explain the legal implications here." (without context)  
+        Tool: `followup_handler`  
+
+        Query:  
+        {query}
+        """
+
     def response_prompt(context: str):
         return f"""
 You are a professional Legal Assistant. 
@@ -0,0 +1,55 @@
+from dataclasses import dataclass, fields
+import json
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# <----- Search & Index Profiles ----->
+# Per-collection HNSW build settings and hybrid search settings. The defaults are the
+# values the service always used; overrides come from SEARCH_PROFILES (inline JSON) or
+# SEARCH_PROFILES_PATH (a JSON file), keyed by collection with an optional "default":
+#
+#   {"default": {"ef": 256}, "act": {"dense_limit": 4, "rrf_k": 60, "M": 32}}
+#
+# Pick the values with `python -m benchmarks.search_tuning`.
+@dataclass(frozen=True)
+class IndexProfile:
+    M: int = 64
+    ef_construction: int = 256
+
+@dataclass(frozen=True)
+class SearchProfile:
+    ef: int = 512
+    dense_limit: int = 2
+    sparse_limit: int = 2
+    drop_ratio: float = 0.0
+    rrf_k: int = 100
+    limit: int = 5
+
+def load_profiles() -> dict:
+    raw = os.getenv("SEARCH_PROFILES")
+    path = os.getenv("SEARCH_PROFILES_PATH")
+    if raw:
+        return json.loads(raw)
+    if path:
+        with open(path) as file:
+            return json.load(file)
+    return {}
+
+def build_profile(cls, settings: dict):
+    names = {field.name for field in fields(cls)}
+    return cls(**{key: value for key, value in settings.items() if key in names})
+
+def resolve(cls, collection: str):
+    defaults = profiles.get("default", {})
+    return build_profile(cls, {**defaults, **profiles.get(collection, {})})
+
+profiles = load_profiles()
+
+def get_search_profile(collection: str) -> SearchProfile:
+    return resolve(SearchProfile, collection)
+
+def get_index_profile(collection: str) -> IndexProfile:
+    return resolve(IndexProfile, collection)
@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+import os
+import re
+
+from dotenv import load_dotenv
+
+from services.search_profiles import IndexProfile, SearchProfile
+
+load_dotenv()
+
+# <----- Vector Store Interface ----->
+# Everything ingestion and search need from a backend. Rows are dicts with `id`, `vector`,
+# `text`, `chunk_hash` and the METADATA_FIELDS; hybrid_search returns hits as
+# {"id", "text", "distance"} dicts, best first, fused from a dense and a BM25 request
+# with reciprocal rank fusion, both restricted to the rows matching `filters`. Index and
+# search settings default to the collection's profile (see search_profiles).
+class VectorStore(ABC):
+    @abstractmethod
+    def has_collection(self, collection: str) -> bool: ...
+
+    @abstractmethod
+    def create_collection(self, collection: str, index_profile: IndexProfile | None = None) -> dict: ...
+
+    @abstractmethod
+    def list_collections(self) -> list[str]: ...
+
+    @abstractmethod
+    def drop_collection(self, collection: str): ...
+
+    @abstractmethod
+    def fields(self, collection: str) -> set[str]: ...
+
+    @abstractmethod
+    def upsert(self, collection: str, rows: list[dict]) -> int: ...
+
+    @abstractmethod
+    def delete(self, collection: str, ids: list[str]) -> int: ...
+
+    @abstractmethod
+    def hashes_with_prefix(self, collection: str, prefix: str, with_hash: bool = True) -> dict[str, str | None]: ...
+
+    @abstractmethod
+    def vectors_by_hash(self, collection: str, hashes: list[str]) -> dict[str, list[float]]: ...
+
+    # Brings a collection into memory ahead of the first search; a no-op where that does not apply
+    def load_collection(self, collection: str):
+        pass
+
+    # Batches of stored rows (id, text, vector, chunk_hash), for re-indexing and tuning
+    @abstractmethod
+    def iter_rows(self, collection: str, batch_size: int = 1000): ...
+
+    @abstractmethod
+    def hybrid_search(self, collection: str, query: str, vector: list[float], limit: int | None = None, filters: dict | None = None, profile: SearchProfile | None = None) -> list[dict]: ...
+
+# <----- Metadata & Filters ----->
+# Document level metadata stored on every chunk. Text values are stored and compared
+# case-folded with collapsed whitespace; year is an int with 0 for unknown.
+METADATA_FIELDS = ("country", "state", "court", "year")
+TEXT_FIELDS = ("country", "state", "court")
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+def normalize_text(value) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+# "IN THE HIGH COURT OF GUJARAT" and "Gujarat High Court" name the same court
+COURT_OF_PATTERN = re.compile(r"^(?:in\s+)?(?:the\s+)?(high court) of (?:judicature (?:at|for) )?(.+?)$")
+
+def normalize_court(value) -> str:
+    court = normalize_text(value)
+    match = COURT_OF_PATTERN.match(court)
+    return f"{match.group(2)} {match.group(1)}" if match else court
+
+def parse_year(value) -> int:
+    match = re.search(r"\b(1[89]\d{2}|20\d{2})\b", str(value or ""))
+    return int(match.group(1)) if match else 0
+
+def normalize_metadata(metadata: dict | None) -> dict:
+    metadata = metadata or {}
+    normalized = {field: normalize_text(metadata.get(field))[:256] for field in TEXT_FIELDS}
+    normalized["court"] = normalize_court(metadata.get("court"))[:256]
+    normalized["year"] = parse_year(metadata.get("year"))
+    return normalized
+
+# Filters arrive as {"court": "Gujarat High Court", "year": 2023}; a list means any of
+# the values, and year also takes a range such as {"gte": 2020, "lte": 2023}.
+# They are parsed into {field: {"in": [...]}} / {field: {"gte": ...}} conditions.
+def parse_filters(filters: dict | None) -> dict:
+    if not filters:
+        return {}
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+    parsed = {}
+    for field, value in filters.items():
+        if field not in METADATA_FIELDS:
+            raise ValueError(f"Unknown filter field: {field}")
+        if value is None or value == "" or value == []:
+            continue
+        if field == "year" and isinstance(value, dict):
+            unknown = set(value) - set(RANGE_OPERATORS)
+            if unknown:
+                raise ValueError(f"Unknown year operator: {', '.join(sorted(unknown))}")
+            try:
+                parsed[field] = {operator: int(bound) for operator, bound in value.items()}
+            except (TypeError, ValueError):
+                raise ValueError("year bounds must be integers")
+            continue
+        values = value if isinstance(value, list) else [value]
+        if field == "year":
+            years = [parse_year(item) for item in values]
+            if not all(years):
+                raise ValueError("year must be a four digit year")
+            parsed[field] = {"in": years}
+        else:
+            normalize = normalize_court if field == "court" else normalize_text
+            parsed[field] = {"in": [normalize(item) for item in values]}
+    return parsed
+
+def filter_matches(metadata: dict, filters: dict) -> bool:
+    for field, condition in filters.items():
+        value = metadata.get(field)
+        if "in" in condition and value not in condition["in"]:
+            return False
+        if "gt" in condition and not value > condition["gt"]:
+            return False
+        if "gte" in condition and not value >= condition["gte"]:
+            return False
+        if "lt" in condition and not value < condition["lt"]:
+            return False
+        if "lte" in condition and not value <= condition["lte"]:
+            return False
+    return True
+
+# Reciprocal rank fusion over ranked key lists (rank starts at 1), as Milvus' RRFRanker
+def rrf_fuse(rankings: list[list], k: int, limit: int) -> list[tuple]:
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+def get_vector_store(backend: str | None = None) -> VectorStore:
+    backend = backend or os.getenv("VECTOR_STORE", "milvus")
+    if backend == "local":
+        from services.local_store import LocalStore
+        return LocalStore()
+    if backend == "milvus":
+        from services.milvus_store import MilvusStore
+        return MilvusStore()
+    raise ValueError(f"Unknown VECTOR_STORE: {backend}")
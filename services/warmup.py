@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+import asyncio
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+from services.milvus_services import get_store, run_in_store_executor
+from services.embedder import get_embedder
+from services.extractors import get_pdf_pool, PDF_WORKERS
+from utils.llms import get_llm
+from utils.llm_scheduler import llm_scheduler
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# <----- Warm-up & Readiness ----->
+# Startup only schedules warm_up(), so the app serves /healthz right away. Warm-up connects
+# to the vector store and loads every collection, sends a trial embedding and (unless
+# WARMUP_LLM=false) a one-token LLM call, and spawns the PDF workers. /readyz turns 200
+# once every required check passed; failed required checks are retried every
+# WARMUP_RETRY_SECONDS. The LLM and the PDF pool are reported but never hold back
+# readiness, and are not retried.
+WARMUP_LLM = os.getenv("WARMUP_LLM", "true").lower() == "true"
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "10"))
+
+@dataclass
+class Dependency:
+    name: str
+    required: bool
+    state: str = "pending"
+    error: str | None = None
+    latency_ms: float | None = None
+    checked: float | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "error": self.error,
+            "latency_ms": self.latency_ms,
+            "checked": self.checked,
+        }
+
+async def warm_vector_store():
+    store = await run_in_store_executor(get_store)
+    collections = await run_in_store_executor(store.list_collections)
+    for collection in collections:
+        await run_in_store_executor(store.load_collection, collection)
+
+async def warm_embedder():
+    await get_embedder().aembed_query(text="warm up")
+
+# The trial call goes through the scheduler, so it is counted against the rate limits
+async def warm_llm():
+    get_llm()
+    if WARMUP_LLM:
+        await llm_scheduler.ainvoke("ping", priority="warmup", max_tokens=1)
+
+async def warm_pdf_pool():
+    if PDF_WORKERS > 1:
+        pool = get_pdf_pool()
+        # One trivial task per worker makes the spawn context start the processes now
+        await asyncio.gather(*(asyncio.wrap_future(pool.submit(os.getpid)) for _ in range(PDF_WORKERS)))
+
+CHECKS = {
+    "vector_store": (warm_vector_store, True),
+    "embedder": (warm_embedder, True),
+    "llm": (warm_llm, False),
+    "pdf_pool": (warm_pdf_pool, False),
+}
+
+dependencies = {name: Dependency(name=name, required=required) for name, (_, required) in CHECKS.items()}
+
+async def check(name: str):
+    dependency = dependencies[name]
+    check_func, _ = CHECKS[name]
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(check_func(), timeout=WARMUP_TIMEOUT)
+        dependency.state = "ready"
+        dependency.error = None
+    except Exception as e:
+        dependency.state = "failed"
+        dependency.error = f"{type(e).__name__}: {e}"
+        logger.warning("Warm-up of %s failed: %s", name, dependency.error)
+    dependency.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+    dependency.checked = time.time()
+
+async def warm_up():
+    await asyncio.gather(*(check(name) for name in dependencies))
+    while not is_ready():
+        await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        await asyncio.gather(*(check(name) for name, dependency in dependencies.items() if dependency.required and dependency.state != "ready"))
+    logger.info("Warm-up complete: %s", {name: f"{dependency.state} in {dependency.latency_ms}ms" for name, dependency in dependencies.items()})
+
+def is_ready() -> bool:
+    return all(dependency.state == "ready" for dependency in dependencies.values() if dependency.required)
+
+def health() -> dict:
+    return {name: dependency.to_dict() for name, dependency in dependencies.items()}
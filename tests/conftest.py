@@ -0,0 +1,6 @@
+# The services build Groq, Nomic and the vector store lazily, so swapping in the offline
+# fakes before anything imports them keeps the tests off the network.
+from benchmarks import fakes
+
+fakes.latency.update(llm=0, embed=0, milvus=0)
+fakes.install()
@@ -0,0 +1,65 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+from benchmarks.synthetic import judgment_json
+from services.answer_cache import answer_cache
+from services import chat_service
+from services.chat_service import answer, generate_answer, stream_answer
+from services.milvus_services import build_context, insert
+
+def seed(file_name: str):
+    body = json.dumps(judgment_json(5_000, seed=3)).encode("utf-8")
+    insert(collection="order", file_name=file_name, file_type="json", file=SimpleNamespace(file=io.BytesIO(body)))
+
+def chat(query: str, intent) -> list:
+    return asyncio.run(answer(query=query, chat_history=[], current_intent=intent))
+
+def chat_stream(query: str, intent) -> list:
+    async def run():
+        return [data async for event, data in stream_answer(query=query, chat_history=[], current_intent=intent) if event == "end"][0]
+    return asyncio.run(run())
+
+def test_fanout_cache_hit_returns_the_requested_intent():
+    seed("test_fanout_cache")
+    query = "grounds for anticipatory bail under the special act"
+    first = chat(query, None)
+    hits = answer_cache.hits
+
+    intent = ["act", "order"]
+    second = chat(query, intent)
+    assert answer_cache.hits == hits + 1
+    assert second[2] == ["act", "order"]
+    assert second[2] is not intent
+    assert first[2] is None
+
+    streamed = chat_stream(query, ["order", "act"])
+    assert answer_cache.hits == hits + 2
+    assert streamed[2] == ["order", "act"]
+
+def test_answer_cache_needs_the_same_chunks_and_filters(monkeypatch):
+    chunks = {
+        "first": {"id": "test_same_document_@_aaaa", "text": "The appeal is allowed and the conviction is set aside."},
+        "second": {"id": "test_same_document_@_bbbb", "text": "Costs of the proceedings are to be borne by the respondent."},
+    }
+
+    def chat_with(chunk: str, filters=None) -> list:
+        async def retrieve(query, chat_history, current_intent, filters=None):
+            return query, 0, build_context([dict(chunks[chunk])])
+
+        monkeypatch.setattr(chat_service, "retrieve", retrieve)
+        return asyncio.run(generate_answer(query="what did the court order", chat_history=[], current_intent="order", filters=filters))
+
+    first = chat_with("first")
+    hits = answer_cache.hits
+    # Same query and same document, but a different passage of it
+    second = chat_with("second")
+    assert first[3] == second[3] == ["test_same_document"]
+    assert answer_cache.hits == hits
+
+    chat_with("first", filters={"court": {"in": ["supreme court"]}})
+    assert answer_cache.hits == hits
+
+    chat_with("first")
+    assert answer_cache.hits == hits + 1
@@ -0,0 +1,21 @@
+import io
+import json
+from types import SimpleNamespace
+
+from benchmarks.synthetic import judgment_json
+from services.milvus_services import insert
+
+def upload(file_name: str, body: bytes, progress) -> dict:
+    return insert(collection="order", file_name=file_name, file_type="json", file=SimpleNamespace(file=io.BytesIO(body)), progress=progress)
+
+def test_reupload_reports_every_chunk_unchanged():
+    body = json.dumps(judgment_json(20_000, seed=7)).encode("utf-8")
+    upload("test_reupload", body, lambda stage, **counts: None)
+
+    reported = {}
+    response = upload("test_reupload", body, lambda stage, **counts: reported.update(counts))
+
+    assert response["chunks"] > 0
+    assert reported["unchanged"] == reported["chunks"] == response["chunks"]
+    assert reported["embedded"] == 0
+    assert reported["inserted"] == 0
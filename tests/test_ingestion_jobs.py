@@ -0,0 +1,32 @@
+import asyncio
+import json
+import tempfile
+
+from benchmarks.synthetic import judgment_json
+from services.ingestion_jobs import IngestionQueue, SpooledUpload
+from services.milvus_services import get_store
+
+def run_job(collection: str) -> dict:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as spool:
+        spool.write(json.dumps(judgment_json(2_000, seed=1)).encode("utf-8"))
+
+    async def run():
+        queue = IngestionQueue(maxsize=1, workers=1)
+        await queue.start()
+        job = queue.submit(collection=collection, file_name="test_job", file_type="json", upload=SpooledUpload(path=spool.name, filename="test_job.json"))
+        while job.finished is None:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return job.to_dict()
+
+    return asyncio.run(run())
+
+def test_job_fails_when_the_collection_cannot_be_created(monkeypatch):
+    store = get_store()
+    monkeypatch.setattr(store, "create_collection", lambda collection, index_profile=None: {"status": 500, "message": "quota exceeded"})
+
+    job = run_job("test_uncreatable")
+
+    assert job["stage"] == "failed"
+    assert "quota exceeded" in job["error"]
+    assert job["inserted"] == 0
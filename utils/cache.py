@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+# <----- LRU + TTL Cache ----->
+# Thread-safe, so one instance can be shared by the event loop and the executor threads.
+# With a `path`, entries are also written to a SQLite file and survive restarts; the
+# in-memory tier stays the LRU in front of it. Values must be JSON serializable.
+# Disk writes are buffered and committed in batches (every `flush_size` entries or
+# `flush_interval` seconds) under their own lock, so a `set` never waits on a commit it
+# does not trigger. Every `evict_interval` seconds a flush also drops expired rows and the
+# oldest rows beyond `disk_maxsize`. Async callers use get(key, disk=False) on the event
+# loop and, only when `persistent` and that missed, finish with get(key) in a thread.
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None, path: str | None = None,
+                 disk_maxsize: int | None = None, flush_size: int = 64, flush_interval: float = 1.0, evict_interval: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_maxsize = disk_maxsize
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.evict_interval = evict_interval
+        self._data = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._flushed = time.monotonic()
+        self._evicted = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, created REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+            self._evict()
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str, disk: bool = True):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+            if self._db is None:
+                self.misses += 1
+                return None
+            if not disk:
+                # Not counted as a miss: the caller goes on to the disk tier
+                return None
+            # Written already but maybe pushed out of memory before the next flush
+            row = self._pending.get(key)
+
+        if row is None:
+            with self._db_lock:
+                row = self._db.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row and not self._expired(row[1]):
+                value = json.loads(row[0])
+                self._store(key, value, row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value):
+        created = time.time()
+        with self._lock:
+            self._store(key, value, created)
+            if self._db is None:
+                return
+            self._pending[key] = (json.dumps(value), created)
+            due = len(self._pending) >= self.flush_size or time.monotonic() - self._flushed >= self.flush_interval
+        if due:
+            self.flush()
+
+    # Writes the buffered entries; also called on shutdown so nothing buffered is lost
+    def flush(self):
+        if self._db is None:
+            return
+        with self._lock:
+            rows = [(key, value, created) for key, (value, created) in self._pending.items()]
+            self._pending.clear()
+            self._flushed = time.monotonic()
+        with self._db_lock:
+            if rows:
+                self._db.executemany("INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)", rows)
+            if time.monotonic() - self._evicted >= self.evict_interval:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        self._evicted = time.monotonic()
+        deleted = 0
+        if self.ttl is not None:
+            deleted += self._db.execute("DELETE FROM cache WHERE created < ?", (time.time() - self.ttl,)).rowcount
+        if self.disk_maxsize is not None:
+            excess = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.disk_maxsize
+            if excess > 0:
+                deleted += self._db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY created LIMIT ?)", (excess,)
+                ).rowcount
+        self.disk_evictions += deleted
+
+    def _store(self, key: str, value, created: float):
+        self._data[key] = (value, created)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._pending.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "pending_writes": len(self._pending),
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
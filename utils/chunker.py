@@ -1,32 +1,81 @@
+from collections import deque
+import hashlib
+import os
+import re
+from dotenv import load_dotenv
 
-# <----- Type wise Chunks ----->
-def get_judgement_chunks(text: str) -> list[str]:
-    splitted_texts = text.split("# SEPERATOR #")
-    # splitted_texts.pop()
-    return splitted_texts
-
-def get_act_chunks(text: str) -> list[str]:
-    splitted_texts = text.split("# SEPERATOR #")
-
-def get_order_chunks(text: str) -> list[str]:
-    splitted_texts = text.split("# SEPERATOR #")
-    # splitted_texts.pop()
-    return splitted_texts
-
-# <----- Chunks ----->
-def chunker(text: str, category: str) -> list[str]:
-    if category == "judgement":
-        chunks = get_judgement_chunks(text)
-        return chunks
-    
-    elif category == "order":
-        chunks = get_order_chunks(text)
-        return chunks
-
-    else:
-        chunks = [text]
-        return chunks
+load_dotenv()
 
 # <----- File IDs ----->
-def create_ids(name: str, length: int) -> list[str]:
-    return [f"{name}_@_{i}" for i in range(0, length+1)]
\ No newline at end of file
+def chunk_id(name: str, key) -> str:
+    return f"{name}_@_{key}"
+
+# Whitespace-insensitive, so re-extracting the same text always gives the same hash
+def chunk_fingerprint(text: str) -> str:
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+# <----- Chunking Engine ----->
+# Everything here is a generator and linear in the input: chunks are packed from a list
+# of pieces that is joined once per chunk, never by growing a string piece by piece.
+CHUNK_UNIT = os.getenv("CHUNK_UNIT", "chars")
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "0"))
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?]) +')
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text: str) -> int:
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+def get_measure(unit: str = CHUNK_UNIT):
+    return count_tokens if unit == "tokens" else len
+
+# Same pieces as re.split(r'(?<=[.!?]) +', text), produced lazily
+def split_sentences(text: str):
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+# Fixed-width windows, as the old one-character-at-a-time metadata loop produced
+def split_fixed(text: str, size: int):
+    for start in range(0, len(text), size):
+        yield text[start:start + size].strip()
+
+# Greedily packs pieces into chunks of at most `max_size` (in `measure` units). A piece
+# that does not fit starts a new chunk, and a single oversized piece becomes a chunk of
+# its own. With `overlap`, the trailing pieces of the previous chunk that fit in
+# `overlap` units are repeated at the start of the next one.
+def pack_chunks(pieces, max_size: int, joiner: str = " ", measure=len, overlap: int = 0):
+    joiner_size = measure(joiner)
+    buffer = []
+    size = 0
+    for piece in pieces:
+        piece_size = measure(piece)
+        if size + piece_size > max_size:
+            if size:
+                yield joiner.join(buffer).strip()
+            buffer, size = carry_overlap(buffer, overlap, joiner_size, measure) if overlap else ([], 0)
+            if size and size + joiner_size + piece_size > max_size:
+                buffer, size = [], 0
+
+        if size:
+            buffer.append(piece)
+            size += joiner_size + piece_size
+        else:
+            buffer = [piece]
+            size = piece_size
+
+    if size:
+        yield joiner.join(buffer).strip()
+
+def carry_overlap(buffer: list[str], overlap: int, joiner_size: int, measure) -> tuple[list[str], int]:
+    tail = deque()
+    size = 0
+    for piece in reversed(buffer):
+        piece_size = measure(piece) + (joiner_size if tail else 0)
+        if size + piece_size > overlap:
+            break
+        tail.appendleft(piece)
+        size += piece_size
+    return list(tail), size
\ No newline at end of file
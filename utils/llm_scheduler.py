@@ -0,0 +1,325 @@
+from dataclasses import dataclass
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import time
+
+from dotenv import load_dotenv
+
+from utils.chunker import count_tokens
+from utils.llms import add_response_hook, get_llm, llm_with_tool, GROQ_MAX_TOKENS
+from utils.observability import LLM_FALLBACKS, LLM_QUEUE_DEPTH, LLM_QUEUE_SECONDS, LLM_REJECTIONS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# <----- Settings ----->
+# Budgets come from Groq's x-ratelimit-* response headers. LLM_REQUESTS_PER_MINUTE and
+# LLM_TOKENS_PER_MINUTE (0 = off) give a starting budget until the first headers arrive,
+# which is then tracked locally from usage_metadata.
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "256"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "512"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_RATE_LIMIT_ATTEMPTS = int(os.getenv("LLM_RATE_LIMIT_ATTEMPTS", "2"))
+LLM_THROTTLE_SECONDS = float(os.getenv("LLM_THROTTLE_SECONDS", "5"))
+
+# Lower goes first: answers for users already past retrieval beat rewrites of new queries,
+# and the startup warm-up call never gets ahead of a user
+PRIORITIES = {"chat": 0, "rewrite": 1, "warmup": 2}
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+# Groq writes resets as "2m59.56s", "7.66s" or "350ms"
+def parse_duration(value: str | None) -> float:
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(amount) * DURATION_SECONDS[unit] for amount, unit in DURATION_PART.findall(value))
+
+def estimate_tokens(messages, max_tokens: int | None = None) -> int:
+    if isinstance(messages, str):
+        prompt = count_tokens(messages)
+    else:
+        prompt = sum(count_tokens(str(m.get("content") or "")) if isinstance(m, dict) else count_tokens(str(m)) for m in messages)
+    return prompt + (max_tokens or GROQ_MAX_TOKENS or LLM_COMPLETION_TOKENS)
+
+def is_rate_limit(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or "rate limit" in str(error).lower()
+
+class RateLimitExceeded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Groq rate limit exceeded ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+# <----- Budget ----->
+# Remaining requests and tokens of one model's current window. None means unknown, which
+# never holds a call back. A call larger than a whole LLM_TOKENS_PER_MINUTE window only
+# waits for a full one.
+@dataclass
+class Budget:
+    requests: float | None = LLM_REQUESTS_PER_MINUTE or None
+    tokens: float | None = LLM_TOKENS_PER_MINUTE or None
+    requests_reset: float = 0.0
+    tokens_reset: float = 0.0
+    blocked_until: float = 0.0
+    from_headers: bool = False
+
+    def needed(self, tokens: int) -> int:
+        return min(tokens, LLM_TOKENS_PER_MINUTE) if LLM_TOKENS_PER_MINUTE else tokens
+
+    def refresh(self, now: float):
+        if self.requests_reset and now >= self.requests_reset:
+            self.requests, self.requests_reset = LLM_REQUESTS_PER_MINUTE or None, 0.0
+        if self.tokens_reset and now >= self.tokens_reset:
+            self.tokens, self.tokens_reset = LLM_TOKENS_PER_MINUTE or None, 0.0
+
+    def allows(self, tokens: int, now: float) -> bool:
+        self.refresh(now)
+        if now < self.blocked_until:
+            return False
+        if self.requests is not None and self.requests < 1:
+            return False
+        return self.tokens is None or self.tokens >= self.needed(tokens)
+
+    def ready_at(self, tokens: int, now: float) -> float:
+        ready = self.blocked_until
+        if self.requests is not None and self.requests < 1:
+            ready = max(ready, self.requests_reset or now + 1)
+        if self.tokens is not None and self.tokens < self.needed(tokens):
+            ready = max(ready, self.tokens_reset or now + 1)
+        return ready
+
+    def reserve(self, tokens: int, now: float):
+        if self.requests is not None:
+            self.requests -= 1
+            self.requests_reset = self.requests_reset or now + 60
+        if self.tokens is not None:
+            self.tokens -= tokens
+            self.tokens_reset = self.tokens_reset or now + 60
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "requests_reset_in": round(max(self.requests_reset - now, 0), 2),
+            "tokens_reset_in": round(max(self.tokens_reset - now, 0), 2),
+            "blocked_for": round(max(self.blocked_until - now, 0), 2),
+        }
+
+# <----- Scheduler ----->
+# Every Groq call takes a slot here first. A call goes straight out when the primary model
+# (GROQ_MODEL_NAME) has budget, else to GROQ_FALLBACK_MODEL_NAME when that has budget, else
+# waits in a bounded priority queue until a window resets. Calls rejected for a full queue
+# or after LLM_QUEUE_TIMEOUT raise RateLimitExceeded with an estimated retry delay, and a
+# 429 from Groq is retried on whichever model frees up first.
+class LLMScheduler:
+    def __init__(self):
+        self.budgets: dict[str, Budget] = {}
+        self.counters = {"calls": 0, "queued": 0, "fallbacks": 0, "throttled": 0, "rejected": 0, "tokens": 0}
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._timer = None
+
+    def models(self) -> list[str]:
+        primary, fallback = os.getenv("GROQ_MODEL_NAME", ""), os.getenv("GROQ_FALLBACK_MODEL_NAME")
+        return [primary, fallback] if fallback and fallback != primary else [primary]
+
+    def budget(self, model: str) -> Budget:
+        budget = self.budgets.get(model)
+        if budget is None:
+            budget = self.budgets[model] = Budget()
+        return budget
+
+    def _pick(self, tokens: int, now: float) -> str | None:
+        for model in self.models():
+            if self.budget(model).allows(tokens, now):
+                return model
+        return None
+
+    def _reserve(self, model: str, tokens: int, priority: str, now: float):
+        self.budget(model).reserve(tokens, now)
+        self.counters["calls"] += 1
+        if model != self.models()[0]:
+            self.counters["fallbacks"] += 1
+            LLM_FALLBACKS.labels(priority).inc()
+
+    def retry_after(self, tokens: int = 0) -> float:
+        now = time.monotonic()
+        ready = min((self.budget(model).ready_at(tokens, now) for model in self.models()), default=now)
+        return max(ready - now, 1.0)
+
+    def _reject(self, priority: str, reason: str, tokens: int) -> RateLimitExceeded:
+        self.counters["rejected"] += 1
+        LLM_REJECTIONS.labels(priority, reason).inc()
+        logger.warning("LLM call rejected: %s", reason)
+        return RateLimitExceeded(reason, self.retry_after(tokens))
+
+    async def acquire(self, priority: str, tokens: int) -> str:
+        now = time.monotonic()
+        # Nobody overtakes the queue, so priorities hold while budget is short
+        model = None if self._waiters else self._pick(tokens, now)
+        if model is not None:
+            self._reserve(model, tokens, priority, now)
+            LLM_QUEUE_SECONDS.labels(priority, model).observe(0)
+            return model
+
+        if len(self._waiters) >= LLM_QUEUE_SIZE:
+            # A full queue sheds its lowest priority call, which may be this one
+            lowest = max(self._waiters)
+            if lowest[0] <= PRIORITIES[priority]:
+                raise self._reject(priority, "queue_full", tokens)
+            self._waiters.remove(lowest)
+            heapq.heapify(self._waiters)
+            lowest[4].set_exception(self._reject(lowest[3], "queue_full", lowest[2]))
+        future = asyncio.get_running_loop().create_future()
+        entry = (PRIORITIES[priority], next(self._sequence), tokens, priority, future)
+        heapq.heappush(self._waiters, entry)
+        self.counters["queued"] += 1
+        LLM_QUEUE_DEPTH.set(len(self._waiters))
+        self._schedule()
+        try:
+            model = await asyncio.wait_for(future, timeout=LLM_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise self._reject(priority, "timeout", tokens) from None
+        except asyncio.CancelledError:
+            # Cancelled right after the slot was granted: hand the budget back
+            if future.done() and not future.cancelled():
+                self.release(future.result(), tokens, None)
+            raise
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                LLM_QUEUE_DEPTH.set(len(self._waiters))
+                self._dispatch()
+        LLM_QUEUE_SECONDS.labels(priority, model).observe(time.monotonic() - now)
+        return model
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self._waiters:
+            _, _, tokens, priority, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            model = self._pick(tokens, now)
+            if model is None:
+                break
+            heapq.heappop(self._waiters)
+            self._reserve(model, tokens, priority, now)
+            future.set_result(model)
+        LLM_QUEUE_DEPTH.set(len(self._waiters))
+        self._schedule()
+
+    # Wakes the queue when the head's budget should be back
+    def _schedule(self):
+        if not self._waiters or self._timer is not None:
+            return
+        delay = self.retry_after(self._waiters[0][2]) if self._pick(self._waiters[0][2], time.monotonic()) is None else 0
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0.05), self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._dispatch()
+
+    # Once headers drive the budget they already count this call, so the usage only
+    # corrects locally tracked budgets
+    def release(self, model: str, tokens: int, usage: dict | None):
+        budget = self.budget(model)
+        used = usage["total_tokens"] if usage else 0
+        self.counters["tokens"] += used
+        if not budget.from_headers and budget.tokens is not None:
+            budget.tokens += tokens - used
+        self._dispatch()
+
+    def throttled(self, model: str, error: Exception):
+        response = getattr(error, "response", None)
+        retry_after = parse_duration(response.headers.get("retry-after")) if response is not None else 0
+        budget = self.budget(model)
+        budget.blocked_until = max(budget.blocked_until, time.monotonic() + (retry_after or LLM_THROTTLE_SECONDS))
+        self.counters["throttled"] += 1
+        logger.warning("Groq throttled %s for %.1fs", model, budget.blocked_until - time.monotonic())
+
+    async def observe_response(self, response):
+        if not response.request.url.path.endswith("/chat/completions"):
+            return
+        try:
+            model = json.loads(response.request.content).get("model")
+        except (ValueError, RuntimeError):
+            return
+        headers = response.headers
+        budget = self.budget(model)
+        now = time.monotonic()
+        if "x-ratelimit-remaining-requests" in headers:
+            budget.requests = float(headers["x-ratelimit-remaining-requests"])
+            budget.requests_reset = now + parse_duration(headers.get("x-ratelimit-reset-requests"))
+            budget.from_headers = True
+        if "x-ratelimit-remaining-tokens" in headers:
+            budget.tokens = float(headers["x-ratelimit-remaining-tokens"])
+            budget.tokens_reset = now + parse_duration(headers.get("x-ratelimit-reset-tokens"))
+            budget.from_headers = True
+        if response.status_code == 429:
+            budget.blocked_until = max(budget.blocked_until, now + (parse_duration(headers.get("retry-after")) or LLM_THROTTLE_SECONDS))
+        self._dispatch()
+
+    # `bind` arguments (e.g. max_tokens) are applied to the model the call gets
+    async def ainvoke(self, messages, priority: str = "chat", tools: tuple = (), **bind):
+        tokens = estimate_tokens(messages, max_tokens=bind.get("max_tokens"))
+        for _ in range(LLM_RATE_LIMIT_ATTEMPTS):
+            model = await self.acquire(priority, tokens)
+            llm = llm_with_tool(*tools, model=model) if tools else get_llm(model)
+            if bind:
+                llm = llm.bind(**bind)
+            try:
+                generation = await llm.ainvoke(messages)
+            except Exception as e:
+                self.release(model, tokens, None)
+                if not is_rate_limit(e):
+                    raise
+                self.throttled(model, e)
+                continue
+            self.release(model, tokens, generation.usage_metadata)
+            return generation
+        raise self._reject(priority, "throttled", tokens)
+
+    # Only a stream that has not produced anything yet is retried after a 429
+    async def astream(self, messages, priority: str = "chat"):
+        tokens = estimate_tokens(messages)
+        for _ in range(LLM_RATE_LIMIT_ATTEMPTS):
+            model = await self.acquire(priority, tokens)
+            generation = None
+            try:
+                async for chunk in get_llm(model).astream(messages):
+                    generation = chunk if generation is None else generation + chunk
+                    yield chunk
+            except Exception as e:
+                if generation is not None or not is_rate_limit(e):
+                    raise
+                self.throttled(model, e)
+                continue
+            finally:
+                self.release(model, tokens, generation.usage_metadata if generation is not None else None)
+            return
+        raise self._reject(priority, "throttled", tokens)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            **self.counters,
+            "waiting": len(self._waiters),
+            "budgets": {model: budget.to_dict(now) for model, budget in self.budgets.items()},
+        }
+
+llm_scheduler = LLMScheduler()
+add_response_hook(llm_scheduler.observe_response)
@@ -1,18 +1,91 @@
 from langchain_groq import ChatGroq
+import httpx
 import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
 
 # from langchain_ollama import ChatOllama
 
-def get_llm():
-    # Local Testing
-    return ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model=os.getenv("GROQ_MODEL_NAME"), temperature=0, max_tokens=None)
+# <----- Settings ----->
+GROQ_TEMPERATURE = float(os.getenv("GROQ_TEMPERATURE", "0"))
+GROQ_MAX_TOKENS = int(os.getenv("GROQ_MAX_TOKENS")) if os.getenv("GROQ_MAX_TOKENS") else None
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "100"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# <----- Registry ----->
+# One long-lived client per model and one bound model per tool set, all sharing the same
+# keep-alive connection pools, so requests never pay for a new TLS handshake or for
+# re-serializing the tool schemas.
+_lock = threading.Lock()
+_http_clients = {}
+_models = {}
+_bound_models = {}
+# Async hooks called with every Groq response (utils.llm_scheduler reads the rate-limit headers).
+# httpx copies the hook list when a client is built, so register through add_response_hook.
+response_hooks = []
+
+def _get_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    if not _http_clients:
+        limits = httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS, max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS)
+        _http_clients["sync"] = httpx.Client(limits=limits, timeout=GROQ_TIMEOUT)
+        _http_clients["async"] = httpx.AsyncClient(limits=limits, timeout=GROQ_TIMEOUT, event_hooks={"response": response_hooks})
+    return _http_clients["sync"], _http_clients["async"]
+
+def add_response_hook(hook):
+    with _lock:
+        response_hooks.append(hook)
+        if _http_clients:
+            _http_clients["async"].event_hooks["response"].append(hook)
+
+def get_llm(model: str | None = None):
+    model = model or os.getenv("GROQ_MODEL_NAME")
+    with _lock:
+        llm = _models.get(model)
+        if llm is None:
+            # Local Testing
+            http_client, http_async_client = _get_http_clients()
+            llm = ChatGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                model=model,
+                temperature=GROQ_TEMPERATURE,
+                max_tokens=GROQ_MAX_TOKENS,
+                max_retries=GROQ_MAX_RETRIES,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+            _models[model] = llm
+        return llm
 
     # Production
     # return ChatOllama(model="llama3.1:8b", base_url="http://192.168.29.156:11434")
 
-def llm_with_tool(*args):
-    llm=get_llm()
-    tools=list(args)
-    return llm.bind_tools(tools, tool_choice="auto")
+def llm_with_tool(*args, model: str | None = None):
+    model = model or os.getenv("GROQ_MODEL_NAME")
+    key = (model, tuple(tool.name for tool in args))
+    bound = _bound_models.get(key)
+    if bound is None:
+        llm=get_llm(model)
+        tools=list(args)
+        bound = llm.bind_tools(tools, tool_choice="auto")
+        with _lock:
+            bound = _bound_models.setdefault(key, bound)
+    return bound
+
+def warmup_llms(*tool_sets):
+    for model in filter(None, (os.getenv("GROQ_MODEL_NAME"), os.getenv("GROQ_FALLBACK_MODEL_NAME"))):
+        get_llm(model)
+        for tools in tool_sets:
+            llm_with_tool(*tools, model=model)
+
+async def close_llms():
+    with _lock:
+        clients = dict(_http_clients)
+        _http_clients.clear()
+        _models.clear()
+        _bound_models.clear()
+    if clients:
+        clients["sync"].close()
+        await clients["async"].aclose()
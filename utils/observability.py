@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+load_dotenv()
+
+# <----- Logging ----->
+# Every record carries the id of the request it was logged under ("-" outside requests).
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+trace_var: ContextVar[list | None] = ContextVar("trace", default=None)
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+def configure_logging(level: str = LOG_LEVEL):
+    root = logging.getLogger()
+    if any(isinstance(f, RequestIdFilter) for handler in root.handlers for f in handler.filters):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(RequestIdFilter())
+    root.addHandler(handler)
+    root.setLevel(level)
+
+logger = logging.getLogger(__name__)
+
+# <----- Metrics ----->
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUESTS = Counter("thelaws_requests_total", "HTTP requests", ["endpoint", "status"])
+REQUEST_SECONDS = Histogram("thelaws_request_seconds", "HTTP request latency until the response starts", ["endpoint"], buckets=LATENCY_BUCKETS)
+STAGE_SECONDS = Histogram("thelaws_stage_seconds", "Duration of a request stage", ["stage"], buckets=LATENCY_BUCKETS)
+STAGE_ERRORS = Counter("thelaws_stage_errors_total", "Stages that raised", ["stage"])
+STAGE_TOKENS = Counter("thelaws_stage_tokens_total", "LLM tokens spent per stage", ["stage"])
+STAGE_HITS = Histogram("thelaws_stage_hits", "Search hits returned per stage", ["stage"], buckets=(0, 1, 2, 3, 5, 8, 13, 21))
+LLM_QUEUE_SECONDS = Histogram("thelaws_llm_queue_seconds", "Time an LLM call waited for rate-limit budget", ["priority", "model"], buckets=LATENCY_BUCKETS)
+LLM_QUEUE_DEPTH = Gauge("thelaws_llm_queue_depth", "LLM calls waiting for rate-limit budget")
+LLM_REJECTIONS = Counter("thelaws_llm_rejections_total", "LLM calls rejected by the scheduler", ["priority", "reason"])
+LLM_FALLBACKS = Counter("thelaws_llm_fallbacks_total", "LLM calls sent to the fallback model", ["priority"])
+COALESCE_CALLS = Counter("thelaws_coalesce_calls_total", "Calls through a single-flight layer", ["layer"])
+COALESCED = Counter("thelaws_coalesced_total", "Calls that joined an identical call already in flight", ["layer"])
+
+def metrics_payload() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+# <----- Spans ----->
+# `with span("search", collection=...) as attrs:` times the block and records it in the
+# stage histogram; the block may add "tokens" and "hits" to attrs, which also go to their
+# metrics. Spans are appended to the current request's trace and logged at DEBUG.
+@contextmanager
+def span(stage: str, **attrs):
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException:
+        STAGE_ERRORS.labels(stage).inc()
+        attrs["error"] = True
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(duration)
+        if attrs.get("tokens"):
+            STAGE_TOKENS.labels(stage).inc(attrs["tokens"])
+        if "hits" in attrs:
+            STAGE_HITS.labels(stage).observe(attrs["hits"])
+        record = {"stage": stage, "ms": round(duration * 1000, 2), **attrs}
+        trace = trace_var.get()
+        if trace is not None:
+            trace.append(record)
+        logger.debug("span %s", record)
+
+@contextmanager
+def request_trace(request_id: str):
+    request_token = request_id_var.set(request_id)
+    trace_token = trace_var.set([])
+    try:
+        yield
+    finally:
+        trace = trace_var.get()
+        if trace:
+            logger.info("trace %s", " ".join(f"{record['stage']}={record['ms']}ms" for record in trace))
+        trace_var.reset(trace_token)
+        request_id_var.reset(request_token)
+
+# <----- Request Context ----->
+# Plain ASGI middleware, so the request id and trace also cover streamed response bodies.
+# The id comes from X-Request-ID when the client sends one and is echoed back.
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        def endpoint() -> str:
+            route = scope.get("route")
+            return getattr(route, "path", "unmatched")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers") or []) + [(b"x-request-id", request_id.encode("latin-1"))]
+                REQUEST_SECONDS.labels(endpoint()).observe(time.perf_counter() - start)
+            await send(message)
+
+        with request_trace(request_id):
+            try:
+                await self.app(scope, receive, send_with_id)
+            finally:
+                REQUESTS.labels(endpoint(), str(status["code"])).inc()
@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+
+# <----- Stage Stats ----->
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float):
+        with self._lock:
+            self.items += items
+            self.batches += 1
+            self.seconds += seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "items_per_second": round(self.items / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+def batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# <----- Pipeline ----->
+# Runs `source` (an iterable of batches) through `stages`, a list of (name, func, workers).
+# Every stage has its own worker threads and a bounded input queue, so a slow stage pushes
+# back on the ones before it instead of letting batches pile up in memory. The source runs
+# on the calling thread. The first exception aborts every stage and is re-raised here.
+_DONE = object()
+
+class PipelineAborted(Exception):
+    pass
+
+def run_pipeline(source, stages: list[tuple], queue_size: int = 4) -> dict[str, StageStats]:
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stats = {"source": StageStats("source")}
+    stats.update({name: StageStats(name) for name, _, _ in stages})
+    abort = threading.Event()
+    errors = []
+
+    def put(q, item):
+        while not abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise PipelineAborted()
+
+    def get(q):
+        while not abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise PipelineAborted()
+
+    remaining = [workers for _, _, workers in stages]
+    remaining_lock = threading.Lock()
+
+    def worker(index: int):
+        name, func, _ = stages[index]
+        try:
+            while True:
+                batch = get(queues[index])
+                if batch is _DONE:
+                    break
+                start = time.perf_counter()
+                result = func(batch)
+                stats[name].record(len(batch), time.perf_counter() - start)
+                if index + 1 < len(stages):
+                    put(queues[index + 1], result)
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and index + 1 < len(stages):
+                for _ in range(stages[index + 1][2]):
+                    put(queues[index + 1], _DONE)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            abort.set()
+
+    threads = [
+        threading.Thread(target=worker, args=(index,), name=f"pipeline-{name}-{n}", daemon=True)
+        for index, (name, _, workers) in enumerate(stages)
+        for n in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        iterator = iter(source)
+        while True:
+            start = time.perf_counter()
+            batch = next(iterator, _DONE)
+            if batch is _DONE:
+                break
+            stats["source"].record(len(batch), time.perf_counter() - start)
+            put(queues[0], batch)
+        for _ in range(stages[0][2]):
+            put(queues[0], _DONE)
+    except PipelineAborted:
+        pass
+    except BaseException as e:
+        errors.append(e)
+        abort.set()
+
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return stats
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+import asyncio
+import copy
+import hashlib
+import json
+import os
+
+from dotenv import load_dotenv
+
+from utils.observability import COALESCE_CALLS, COALESCED
+
+load_dotenv()
+
+# <----- Single-flight ----->
+# Identical calls that overlap in time share one computation: the first caller starts it,
+# everyone arriving before it finishes awaits the same task and gets its own deep copy of
+# the result, so callers can keep mutating what they get back. Nothing is kept after the call
+# finishes, so results are never stale. The shared task only gets cancelled once every
+# caller waiting on it has gone away.
+COALESCING = os.getenv("COALESCING", "true").lower() == "true"
+
+flights = {}
+
+def flight_key(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+@dataclass
+class Flight:
+    task: asyncio.Future
+    waiters: int = 0
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._flights: dict[str, Flight] = {}
+        flights[name] = self
+
+    def _land(self, key: str, flight: Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, func):
+        if not COALESCING:
+            return await func()
+        self.calls += 1
+        COALESCE_CALLS.labels(self.name).inc()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = Flight(task=asyncio.ensure_future(func()))
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+        else:
+            self.coalesced += 1
+            COALESCED.labels(self.name).inc()
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                self._land(key, flight)
+                flight.task.cancel()
+            raise
+        return copy.deepcopy(result)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+            "ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+        }
+
+def get_coalescing_stats() -> dict:
+    return {name: flight.stats() for name, flight in flights.items()}
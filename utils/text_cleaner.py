@@ -0,0 +1,102 @@
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# <----- Text Cleaner ----->
+# Rules are grouped into categories and each category is compiled once into a single
+# alternation, so cleaning costs one scan per category no matter how many rules it has.
+# Categories made only of single-character literals become a str.translate table.
+# Categories run in order, so a later one sees the output of the earlier ones.
+class CleaningCategory:
+    def __init__(self, name: str, rules: list[tuple[str, str]], literal: bool = False, flags: int = 0):
+        self.name = name
+        self.rules = rules
+        self.table = None
+        self.pattern = None
+        sources = [re.escape(source) if literal else f"(?:{source})" for source, _ in rules]
+        replacements = {replacement for _, replacement in rules}
+
+        if literal and all(len(source) == 1 for source, _ in rules):
+            self.table = str.maketrans({source: replacement for source, replacement in rules})
+            return
+
+        if literal:
+            # Longest first, so a literal never loses to one of its own prefixes
+            sources = sorted(sources, key=len, reverse=True)
+        self.pattern = re.compile("|".join(sources), flags)
+
+        if len(replacements) == 1:
+            # A plain replacement string keeps the whole substitution inside the regex engine
+            self.replace = replacements.pop().replace("\\", "\\\\")
+        elif literal:
+            lookup = {source: replacement for source, replacement in rules}
+            if flags & re.IGNORECASE:
+                lookup = {source.casefold(): replacement for source, replacement in rules}
+                self.replace = lambda match: lookup[match[0].casefold()]
+            else:
+                self.replace = lambda match: lookup[match[0]]
+        else:
+            self.pattern = re.compile("|".join(f"(?P<r{i}>{source})" for i, (source, _) in enumerate(rules)), flags)
+            lookup = {f"r{i}": replacement for i, (_, replacement) in enumerate(rules)}
+            self.replace = lambda match: lookup[match.lastgroup]
+
+    def clean(self, text: str) -> str:
+        if self.table is not None:
+            return text.translate(self.table)
+        return self.pattern.sub(self.replace, text)
+
+class TextCleaner:
+    def __init__(self, name: str, categories: list[CleaningCategory], disabled: set[str] | None = None, strip: bool = False):
+        self.name = name
+        self.strip = strip
+        disabled = disabled or set()
+        self.categories = [category for category in categories if f"{name}.{category.name}" not in disabled]
+
+    def clean(self, text: str) -> str:
+        for category in self.categories:
+            text = category.clean(text)
+        return text.strip() if self.strip else text
+
+# Comma separated "<cleaner>.<category>" names, e.g. "act.footnotes"
+DISABLED_CATEGORIES = {name.strip() for name in os.getenv("CLEANING_DISABLED_CATEGORIES", "").split(",") if name.strip()}
+
+order_cleaner = TextCleaner(
+    name="order",
+    categories=[
+        # Runs on its own: dropping the rest of the line can expose a word boundary
+        # that the noise rules below depend on
+        CleaningCategory("download_footer", [(r"Downloaded on\s*:\s*.*", "")], flags=re.IGNORECASE),
+        CleaningCategory("noise", [
+            (r"\bNEUTRAL\s+CITATION\b", ""),
+            (r"\bundefined\b", ""),
+            (r"CR\.MA\/\d+\/\d+\s+\d+\/\d+\s+JUDGMENT", ""),
+        ], flags=re.IGNORECASE),
+        CleaningCategory("separators", [(r"\n=+\n", "\n")]),
+        CleaningCategory("blank_lines", [(r"\n{3,}", "\n\n")]),
+    ],
+    disabled=DISABLED_CATEGORIES,
+    strip=True,
+)
+
+act_cleaner = TextCleaner(
+    name="act",
+    categories=[
+        CleaningCategory("structure", [
+            ("<Section>", ""),
+            ("</Section>", ""),
+            ("<SubSection>", "\n\t"),
+            ("</SubSection>", ""),
+        ], literal=True),
+        CleaningCategory("footnotes", [
+            ("<FNR>", ""),
+            ("</FNR>", ""),
+            ("<FN>", ""),
+            ("</FN>", ""),
+            ("<FT>", ""),
+            ("</FT>", ""),
+        ], literal=True),
+    ],
+    disabled=DISABLED_CATEGORIES,
+)